@@ -0,0 +1,158 @@
+import re
+
+from utils import Utils
+
+
+class AddressResolver:
+    """
+    Поиск адреса из имени файла среди адресов файла сопоставления с учётом разного написания:
+    "Одинцово г, Усово-Тупик п, 3" и "г. Одинцово, п. Усово-Тупик, д. 3" - один и тот же адрес.
+
+    При загрузке для каждого адреса один раз строится нормализованный ключ:
+    сокращения раскрываются ("г." -> "город", "ул" -> "улица"), "д." перед номером отбрасывается,
+    слова сортируются (порядок частей адреса не важен), номера (дом, корпус, строение)
+    сохраняются по порядку. Поиск идёт в три шага:
+    1. точное совпадение строки;
+    2. совпадение нормализованного ключа (со словами-типами, затем без них, если ключ однозначен);
+    3. нечёткий поиск: кандидаты с теми же номерами отбираются по общим триграммам слов
+       (индекс триграмм строится отдельно для каждого набора номеров),
+       лучшие из них сравниваются по словам (fuzz.ratio); результат принимается, если оценка не ниже порога.
+    Результаты запоминаются, поэтому повторный поиск того же адреса - одно обращение к словарю.
+    """
+    ABBREVIATIONS = {
+        "г": "город", "гор": "город",
+        "п": "поселок", "пос": "поселок", "посёлок": "поселок",
+        "рп": "рабочий поселок", "пгт": "поселок городского типа",
+        "с": "село", "дер": "деревня", "мкр": "микрорайон", "мкрн": "микрорайон",
+        "ул": "улица", "пр": "проспект", "пр-т": "проспект", "просп": "проспект",
+        "пер": "переулок", "ш": "шоссе", "б-р": "бульвар", "бул": "бульвар",
+        "пл": "площадь", "пр-д": "проезд", "наб": "набережная", "тер": "территория",
+        "обл": "область", "р-н": "район",
+    }
+    TYPE_WORDS = {
+        "город", "поселок", "рабочий", "городского", "типа", "село", "деревня", "микрорайон",
+        "улица", "проспект", "переулок", "шоссе", "бульвар", "площадь", "проезд", "набережная",
+        "территория", "область", "район", "снт", "кп", "днп",
+    }
+    HOUSE_WORDS = {"д", "дом"} # Перед номером означают дом (иначе "д." - деревня)
+    PART_WORDS = {"к": "к", "корп": "к", "корпус": "к", "стр": "с", "строение": "с", "лит": "л", "литера": "л"}
+    TOKEN_RE = re.compile(r"\d+(?:[а-я](?!\d))?(?:/\d+(?:[а-я](?!\d))?)?|[а-яa-z]+(?:-[а-яa-z]+)*")
+    GRAM = 3
+    FUZZY_CANDIDATES = 10 # Сколько лучших по триграммам кандидатов сравнивать fuzz.ratio
+
+    def __init__(self, addresses=(), threshold=85):
+        self.threshold = threshold
+        self.source = None # Словарь, по которому построен индекс (см. CommissionManager)
+        self._exact = set()
+        self._strict = {} # {ключ со словами-типами: адрес}
+        self._loose = {} # {ключ без слов-типов: множество адресов}
+        self._words = {} # {адрес: строка слов без типов, для нечёткого сравнения}
+        self._grams = {} # {(номера дома, триграмма): множество адресов}
+        self._cache = {}
+        for address in addresses:
+            self.add(address)
+
+    @classmethod
+    def normalize(cls, address):
+        """Возвращает (слова, номера): отсортированные слова с раскрытыми сокращениями и номера по порядку."""
+        text = str(address).lower().replace("ё", "е")
+        tokens = cls.TOKEN_RE.findall(text)
+        words, numbers = [], []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            following = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if token[0].isdigit():
+                # "3а", "3/1"; "3к1" разбивается регуляркой на "3", "к", "1"
+                numbers.append(token)
+            elif token in cls.HOUSE_WORDS and following[:1].isdigit():
+                pass # "д. 3" - номер дома, само слово не нужно
+            elif token in cls.PART_WORDS and following[:1].isdigit():
+                numbers.append(cls.PART_WORDS[token] + following)
+                i += 1
+            elif token == "д":
+                words.append("деревня")
+            else:
+                # "Усово-Тупик" и "Усово Тупик" пишут по-разному, поэтому дефис - тоже разделитель
+                words.extend(cls.ABBREVIATIONS.get(token, token).replace("-", " ").split())
+            i += 1
+        return tuple(sorted(words)), tuple(numbers)
+
+    def add(self, address):
+        words, numbers = self.normalize(address)
+        name_words = tuple(word for word in words if word not in self.TYPE_WORDS)
+        name_text = " ".join(name_words)
+        self._exact.add(address)
+        self._strict[(words, numbers)] = address
+        self._loose.setdefault((name_words, numbers), set()).add(address)
+        self._words[address] = name_text
+        for gram in self._text_grams(name_text):
+            self._grams.setdefault((numbers, gram), set()).add(address)
+        self._cache.clear()
+
+    def remove(self, address):
+        if address not in self._exact:
+            return
+        words, numbers = self.normalize(address)
+        name_words = tuple(word for word in words if word not in self.TYPE_WORDS)
+        self._exact.discard(address)
+        if self._strict.get((words, numbers)) == address:
+            del self._strict[(words, numbers)]
+        self._loose.get((name_words, numbers), set()).discard(address)
+        for gram in self._text_grams(self._words.pop(address, "")):
+            self._grams.get((numbers, gram), set()).discard(address)
+        self._cache.clear()
+
+    def resolve(self, address):
+        """
+        Ищет адрес среди известных. Возвращает (адрес из файла сопоставления, уверенность 0..100, способ)
+        или (None, 0, None). Способ: "exact", "normalized" или "fuzzy".
+        """
+        if address in self._exact:
+            return address, 100, "exact"
+        cached = self._cache.get(address)
+        if cached is None:
+            cached = self._resolve(address)
+            self._cache[address] = cached
+        return cached
+
+    def _resolve(self, address):
+        words, numbers = self.normalize(address)
+        if (words, numbers) in self._strict:
+            return self._strict[(words, numbers)], 100, "normalized"
+        name_words = tuple(word for word in words if word not in self.TYPE_WORDS)
+        loose = self._loose.get((name_words, numbers))
+        if loose and len(loose) == 1:
+            return next(iter(loose)), 100, "normalized"
+
+        # Нечёткий поиск только среди адресов с теми же номерами: дом 3 и дом 5 - разные адреса
+        name_text = " ".join(name_words)
+        shared = {}
+        for gram in self._text_grams(name_text):
+            for candidate in self._grams.get((numbers, gram), ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        if not shared:
+            return None, 0, None
+        candidates = sorted(shared, key=shared.get, reverse=True)[:self.FUZZY_CANDIDATES]
+        best_address, best_score = None, 0
+        for candidate in candidates:
+            score = self._word_score(name_words, self._words[candidate].split())
+            if score > best_score:
+                best_address, best_score = candidate, score
+        if best_score >= self.threshold:
+            return best_address, best_score, "fuzzy"
+        return None, 0, None
+
+    @staticmethod
+    def _word_score(words, candidate_words):
+        """
+        Оценка 0..100 по словам: каждому слову ищется самое похожее слово другого адреса (fuzz.ratio),
+        оценки усредняются в обе стороны и берётся меньшая. Так опечатка в одном слове
+        ("Усова" - "Усово") допустима, а другая улица ("Лесная" - "Ленина") - нет.
+        """
+        matrix = Utils.fuzzy_score_matrix(words, candidate_words)
+        return int(min(matrix.max(axis=1).mean(), matrix.max(axis=0).mean()))
+
+    @classmethod
+    def _text_grams(cls, text):
+        return {text[i:i + cls.GRAM] for i in range(len(text) - cls.GRAM + 1)}
@@ -0,0 +1,260 @@
+import os
+import random
+import shutil
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+
+# Виды работ раздела III (метки полей, которые заполняются из файлов данных)
+WORK_LABELS = [
+    "Объем работ", "Ремонт кровли", "Ремонт чердачных помещений, в том числе",
+    "- утепление (засыпка) чердачного перекрытия", "- изоляция трубопроводов, вентиляционных коробов",
+    "Ремонт фасадов, в том числе", "- ремонт и покраска", "- герметизация швов",
+    "- ремонт водосточных труб", "- утепление оконных проемов", "- утепление дверных проемов",
+    "Ремонт подвальных помещений, в том числе", "- изоляция трубопроводов",
+    "- ремонт дренажных и водоотводящих устройств", "Ремонт покрытий дворовых территорий",
+    "- отмостков", "- приямков", "Ремонт инженерного оборудования", "1) центрального отопления",
+    "радиаторов", "трубопроводов", "запорной арматуры", "промывка и опрессовка", "2) котельных",
+    "котлов на газовом топливе", "то же, на угле", "тепловых пунктов", "элеваторных узлов",
+    "3) горячего водоснабжения", "4) водопровода", "ремонт и замена арматуры", "ремонт и изоляция труб",
+    "5) канализации", "ремонт трубопроводов", "ремонт колодцев", "промывка системы",
+    "6) электрооборудования", "световой электропроводки", "силовой электропроводки",
+    "вводных устройств", "электрощитовых", "электродвигателей", "Другие работы",
+]
+WORK_UNITS = ["кв.м", "м.п", "шт.", ""]
+
+# Общие сведения раздела I: (метка, значение в шаблоне или None - поле заполняется из данных)
+GENERAL_LABELS = [
+    ("износ в %", "21"), ("этажность", None), ("наличие подвалов, цокольных этажей", "Нет"),
+    ("количество квартир", None), ("общая полезная площадь объекта", None), ("жилая площадь", None),
+    ("нежилая площадь", None), ("под производственные нужды", None),
+]
+SOURCE_LABELS = ["теплоснабжения", "газоснабжения", "твердого и жидкого топлива", "энергоснабжения"]
+
+DISTRICTS = ["Одинцово", "Барвихинский", "Голицыно", "Кубинка", "Звенигород", "Заречье"]
+STREETS = ["Садовая ул", "Центральная ул", "Лесная ул", "Школьная ул", "Молодежная ул", "Новая ул",
+           "Советская ул", "Полевая ул", "Луговая ул", "Парковая ул"]
+LAST_COLUMN = 91 # Как в реальном шаблоне: узкие столбцы A:CM
+
+DATA_FILE_PREFIX = "Объемы выполненных работ по подготовке объекта к эксплуатации"
+REPORT_FILE_PREFIX = "Паспорт готовности к эксплуатации"
+
+
+class PassportGenerator:
+    """
+    Генератор синтетических паспортов готовности, файлов данных и таблиц комиссий/адресов
+    для замеров производительности.
+    Паспорт повторяет раскладку реального шаблона: около 140 строк на узких столбцах A:CM,
+    сотни объединённых диапазонов, метки в объединениях слева и ячейки значений справа,
+    таблица работ раздела III и блок комиссии с подписями.
+    Реальные паспорта делаются из одного шаблона, поэтому генерируется несколько вариантов
+    шаблона, а отчёты - их копии с разными адресами в имени файла.
+    """
+    def __init__(self, seed=0, variants=4):
+        self.random = random.Random(seed)
+        self.variants = variants
+        self._thin = Side(style="thin")
+
+    # --- Адреса ---
+    def make_addresses(self, count):
+        """Возвращает `count` уникальных адресов вида 'Одинцово г, Садовая ул, 12'."""
+        addresses = []
+        for i in range(count):
+            district = DISTRICTS[i % len(DISTRICTS)]
+            street = STREETS[(i // len(DISTRICTS)) % len(STREETS)]
+            house = i // (len(DISTRICTS) * len(STREETS)) + 1
+            addresses.append(f"{district} г, {street}, {house}")
+        return addresses
+
+    # --- Шаблон паспорта ---
+    def build_passport(self, has_gas, work_labels):
+        """Строит книгу паспорта. `work_labels` - метки строк таблицы работ."""
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = "Паспорт готовности"
+        for col in range(1, LAST_COLUMN + 1):
+            sheet.column_dimensions[get_column_letter(col)].width = 1.7
+
+        row = 2
+        row = self._title(sheet, row, "Паспорт готовности многоквартирного дома к эксплуатации")
+        row = self._title(sheet, row, "эксплуатации в осенне-зимний период 2025 - 2026 гг.") + 1
+        self._merge(sheet, row, 1, 6, "город")
+        self._merge(sheet, row, 7, 42)
+        self._merge(sheet, row, 43, 49, "район")
+        self._merge(sheet, row, 50, 78)
+        row += 2
+        self._merge(sheet, row, 53, 78, "__________ 20__ г.")
+        row += 2
+        row = self._title(sheet, row, "I. ОБЩИЕ СВЕДЕНИЯ") + 1
+
+        self._merge(sheet, row, 1, 31, "1.  Адрес многоквартирного дома")
+        self._merge(sheet, row, 32, 75)
+        row += 1
+        self._merge(sheet, row, 1, 17, "2. Год постройки")
+        self._merge(sheet, row, 18, 75, str(self.random.randint(1930, 2020)))
+        row += 1
+        row = self._title(sheet, row, "3. Характеристика объекта:", bold=False)
+        for label, value in GENERAL_LABELS:
+            self._merge(sheet, row, 6, 30, label)
+            self._merge(sheet, row, 31, 67, value)
+            self._merge(sheet, row, 68, 75, "(кв. м)" if "площадь" in label else None)
+            row += 1
+
+        row = self._title(sheet, row, "5. Источники:", bold=False)
+        for label in SOURCE_LABELS:
+            self._merge(sheet, row, 6, 21, label)
+            self._merge(sheet, row, 22, 75, "Центральное")
+            row += 1
+            if label == "газоснабжения":
+                # Признак газа под меткой (смещение gas_detection_cell_offset_y = 1)
+                self._merge(sheet, row, 6, 21, "Да" if has_gas else "Нет")
+                self._merge(sheet, row, 22, 75)
+                row += 1
+        for text in ("6. Договор на техническое обслуживание внутридомового газового оборудования",
+                     "7. Акт технического обслуживания внутридомового газового оборудования"):
+            self._merge(sheet, row, 1, 75, text, height=2)
+            row += 2
+        row += 1
+
+        row = self._title(sheet, row, "III. ОБЪЕМЫ ВЫПОЛНЕННЫХ РАБОТ ПО ПОДГОТОВКЕ") + 1
+        header = ["N\nп/п", "Виды выполненных работ по конструкциям", "Единицы\nизмерения",
+                  "Всего по плану подготовки к зиме", "Выполнено", "Примечание"]
+        self._work_row(sheet, row, header)
+        sheet.row_dimensions[row].height = 80.25
+        row += 1
+        for number, label in enumerate(work_labels, start=1):
+            unit = self.random.choice(WORK_UNITS)
+            self._work_row(sheet, row, [f"{number}. ", f" {label}", unit, None, None, None])
+            row += 1
+        row += 2
+
+        row = self._title(sheet, row, "IV. Результаты проверки готовности") + 1
+        self._merge(sheet, row, 1, 10, "Комиссия")
+        self._merge(sheet, row, 11, 23, "в составе:")
+        row += 1
+        self._merge(sheet, row, 1, 13, "председателя")
+        self._merge(sheet, row, 14, 82, "- руководителя управляющей организации")
+        row += 1
+        self._merge(sheet, row, 1, 66)
+        row += 1
+        self._merge(sheet, row, 1, 21, "членов комиссии:")
+        row += 1
+        for group in ("- представителей собственников помещений", "- представителей органа муниципального контроля",
+                      "- представителей специализированных организаций"):
+            self._merge(sheet, row, 1, 69, group)
+            self._merge(sheet, row + 1, 1, 66)
+            self._merge(sheet, row + 2, 1, 66)
+            row += 3
+
+        row += 1
+        for index, label in enumerate(["Председатель комиссии:", "Члены комиссии:", None, None, None]):
+            self._merge(sheet, row, 1, 23, label)
+            sheet.cell(row=row, column=44, value="(")
+            self._merge(sheet, row, 45, 63)
+            sheet.cell(row=row, column=64, value=")")
+            sheet.row_dimensions[row].height = 15.75
+            self._merge(sheet, row + 1, 26, 42, "(подпись)")
+            self._merge(sheet, row + 1, 45, 63, "(Ф.И.О.)")
+            row += 2 if index else 4
+        return workbook
+
+    def _title(self, sheet, row, text, bold=True):
+        self._merge(sheet, row, 1, 82, text)
+        sheet.cell(row=row, column=1).font = Font(bold=bold)
+        sheet.row_dimensions[row].height = 16.5
+        return row + 1
+
+    def _merge(self, sheet, row, first_col, last_col, value=None, height=1):
+        cell = sheet.cell(row=row, column=first_col, value=value)
+        cell.alignment = Alignment(wrap_text=True, vertical="center")
+        sheet.merge_cells(start_row=row, start_column=first_col, end_row=row + height - 1, end_column=last_col)
+
+    def _work_row(self, sheet, row, values):
+        # Столбцы таблицы работ как в шаблоне: A:D, E:AB, AC:AR, AS:BF, BG:BR, BS:CD
+        bounds = [(1, 4), (5, 28), (29, 44), (45, 58), (59, 70), (71, 82)]
+        for (first_col, last_col), value in zip(bounds, values):
+            self._merge(sheet, row, first_col, last_col, value)
+            sheet.cell(row=row, column=first_col).border = Border(self._thin, self._thin, self._thin, self._thin)
+
+    # --- Набор данных ---
+    def generate(self, folder, count, data_format="xlsx"):
+        """
+        Создаёт в `folder` набор для замеров: reports/ (паспорта), data/ (файлы данных),
+        Комиссия.xlsx и Отчет.xlsx. Возвращает словарь с путями.
+        """
+        reports_folder = os.path.join(folder, "reports")
+        data_folder = os.path.join(folder, "data")
+        templates_folder = os.path.join(folder, "templates")
+        for path in (reports_folder, data_folder, templates_folder):
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+
+        # Варианты шаблона: с газом и без, с разным составом таблицы работ
+        templates = []
+        for variant in range(self.variants):
+            has_gas = variant % 2 == 1
+            work_labels = [label for label in WORK_LABELS if self.random.random() > 0.15]
+            template_path = os.path.join(templates_folder, f"template_{variant}.xlsx")
+            self.build_passport(has_gas, work_labels).save(template_path)
+            templates.append((template_path, has_gas, work_labels))
+
+        addresses = self.make_addresses(count)
+        address_rows = []
+        for i, address in enumerate(addresses):
+            template_path, has_gas, work_labels = templates[i % len(templates)]
+            shutil.copy(template_path, os.path.join(reports_folder, f"{REPORT_FILE_PREFIX} ({address}).xlsx"))
+            self._write_data_file(data_folder, address, work_labels, data_format)
+            address_rows.append([address, address.split(" г,")[0], "Да" if has_gas else "Нет"])
+
+        commission_file = os.path.join(folder, "Комиссия.xlsx")
+        address_map_file = os.path.join(folder, "Отчет.xlsx")
+        self._write_table(commission_file, self._commission_rows())
+        self._write_table(address_map_file, [["Адрес", "Район", "Газ"]] + address_rows)
+        return {
+            "reports_folder": reports_folder,
+            "data_folder": data_folder,
+            "commission_types_file": commission_file,
+            "address_map_file": address_map_file,
+        }
+
+    def _write_data_file(self, data_folder, address, work_labels, data_format):
+        rows = [["Поле", "Значение"]]
+        for label, _ in GENERAL_LABELS:
+            rows.append([label, str(self.random.randint(1, 900))])
+        for label in self.random.sample(work_labels, k=min(len(work_labels), 12)):
+            rows.append([label.lstrip("- "), str(self.random.randint(1, 500))])
+        rows.append(["Поле, которого нет в шаблоне", "x"])
+
+        file_name = f"{DATA_FILE_PREFIX} ({address}).{data_format}"
+        path = os.path.join(data_folder, file_name)
+        if data_format == "csv":
+            # Файлы .csv читаются без строки заголовка
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(f"\"{key}\",\"{value}\"\n" for key, value in rows[1:])
+        else:
+            self._write_table(path, rows)
+
+    @staticmethod
+    def _write_table(path, rows):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+
+    def _commission_rows(self):
+        header = ["Район", "Газ", "Председатель", "Должность Председателя"]
+        for i in range(1, 5):
+            header += [f"Член {i}", f"Должность Члена {i}"]
+        header += ["Ресурсник", "Должность Ресурсника"]
+        rows = [header]
+        for district in DISTRICTS:
+            for gas in ("Да", "Нет"):
+                row = [district, gas, "С.В.Кочевалин", "Генеральный директор"]
+                for i in range(1, 5):
+                    row += [f"И.И.Членов{i}", f"Представитель ТУ {district}"]
+                row += (["А.И.Голубев", "Начальник управления по теплоснабжению"] if gas == "Да" else [None, None])
+                rows.append(row)
+        return rows
@@ -0,0 +1,262 @@
+"""
+Замеры производительности заполнения паспортов на синтетических наборах.
+
+Запуск из папки excel_report_filler:
+    python benchmarks/run_benchmarks.py --sizes 281,1000 --output benchmark_results.json
+
+Для каждого размера набора генерируются паспорта, файлы данных и таблицы комиссий/адресов
+(см. PassportGenerator), затем замеряются scan_reports, отдельные этапы обработки отчёта
+на выборке и process_all_reports целиком. Результаты пишутся в JSON, чтобы сравнивать
+прогоны между собой и замечать регрессии в поиске полей и сохранении.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from openpyxl import load_workbook
+
+from config_manager import ConfigManager
+from commission_manager import CommissionManager
+from report_processor import ReportProcessor
+import utils as utils_module
+from utils import Utils
+from xlsx_cell_patcher import XlsxCellPatcher
+from benchmarks.passport_generator import PassportGenerator
+
+
+CONFIG_TEMPLATE = """[Paths]
+reports_folder = {reports_folder}
+data_folder = {data_folder}
+output_folder = {output_folder}
+commission_types_file = {commission_types_file}
+address_map_file = {address_map_file}
+
+[Regex]
+address_extraction_pattern = \\(([^)]+)\\)
+gas_detection_keywords = газ,газоснабжение,газопровод
+gas_detection_cell_offset_x = 0
+gas_detection_cell_offset_y = 1
+
+[FieldMapping]
+
+[Processing]
+workers = {workers}
+fast_fill = {fast_fill}
+
+[Cache]
+template_cache = true
+"""
+
+
+def summarize(samples):
+    """Сводка по замерам (в секундах): число, сумма, среднее, медиана, 95-й перцентиль, минимум, максимум."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "total": round(sum(ordered), 6),
+        "mean": round(statistics.fmean(ordered), 6),
+        "median": round(statistics.median(ordered), 6),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 6),
+        "min": round(ordered[0], 6),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class BenchmarkRunner:
+    """Готовит набор данных одного размера и выполняет замеры на нём."""
+    def __init__(self, workdir, size, workers=1, fast_fill=False, sample=20, data_format="xlsx", seed=0):
+        self.folder = os.path.join(workdir, f"size_{size}")
+        self.size = size
+        self.workers = workers
+        self.fast_fill = fast_fill
+        self.sample = sample
+        self.data_format = data_format
+        self.seed = seed
+        self.logs = []
+
+    def _log(self, message, level="info"):
+        self.logs.append((level, message))
+
+    def prepare(self):
+        """Генерирует набор и config.ini; кэши прошлых прогонов удаляются (замер с холодного старта)."""
+        os.makedirs(self.folder, exist_ok=True)
+        paths, generate_time = timed(PassportGenerator(seed=self.seed).generate, self.folder, self.size, self.data_format)
+        paths["output_folder"] = os.path.join(self.folder, "out")
+        shutil.rmtree(paths["output_folder"], ignore_errors=True)
+        os.makedirs(paths["output_folder"])
+        self.clear_caches()
+
+        self.paths = paths
+        self.config_file = os.path.join(self.folder, "config.ini")
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write(CONFIG_TEMPLATE.format(workers=self.workers, fast_fill=str(self.fast_fill).lower(), **paths))
+        return generate_time
+
+    def _make_processor(self):
+        config_manager = ConfigManager(self.config_file)
+        commission_manager = CommissionManager(config_manager, self._log)
+        commission_manager.load_commission_types(self.paths["commission_types_file"])
+        commission_manager.load_address_commission_map(self.paths["address_map_file"])
+        return ReportProcessor(config_manager, commission_manager, Utils(config_manager), self._log)
+
+    def run(self):
+        result = {"size": self.size, "workers": self.workers, "fast_fill": self.fast_fill,
+                  "data_format": self.data_format}
+        result["generate_s"] = round(self.prepare(), 6)
+
+        processor = self._make_processor()
+        _, scan_time = timed(processor.scan_reports, self.paths["reports_folder"])
+        result["scan_reports_s"] = round(scan_time, 6)
+        report_files = sorted(processor.report_files)
+
+        result["stages"] = self._time_stages(processor, report_files[:self.sample])
+
+        # Полный пакет - на новом процессоре, чтобы кэши выборки не влияли на результат
+        self.clear_caches()
+        processor = self._make_processor()
+        processor.scan_reports(self.paths["reports_folder"])
+        results, total_time = timed(processor.process_all_reports, self.paths["reports_folder"],
+                                    self.paths["data_folder"], self.paths["output_folder"])
+        result["process_all_reports_s"] = round(total_time, 6)
+        result["per_report_s"] = round(total_time / max(len(results), 1), 6)
+        statuses = {}
+        for res in results:
+            statuses[res["status"]] = statuses.get(res["status"], 0) + 1
+        result["statuses"] = statuses
+        # Длительность этапов по данным самого ReportProcessor (result["timings"]) по всему пакету
+        stage_names = sorted({stage for res in results for stage in res.get("timings", {})})
+        result["report_stages"] = {
+            stage: summarize([res["timings"][stage] for res in results if stage in res.get("timings", {})])
+            for stage in stage_names
+        }
+        result["counters"] = {}
+        for res in results:
+            for name, value in res.get("counters", {}).items():
+                result["counters"][name] = result["counters"].get(name, 0) + value
+        result["filled_fields"] = sum(res["filled_fields"] for res in results)
+        result["errors"] = sum(1 for level, _ in self.logs if level == "error")
+        return result
+
+    def clear_caches(self):
+        """Удаляет кэши, которые ReportProcessor хранит рядом с config.ini."""
+        for cache_name in ("template_layouts.json", "data_file_index.json", "data_cache"):
+            cache_path = os.path.join(self.folder, cache_name)
+            if os.path.isdir(cache_path):
+                shutil.rmtree(cache_path)
+            elif os.path.exists(cache_path):
+                os.remove(cache_path)
+
+    def _time_stages(self, processor, report_files):
+        """Замеряет этапы process_single_report по отдельности на выборке отчётов."""
+        stages = {name: [] for name in (
+            "prescan", "gas_detection", "data_file", "field_matching", "full_load",
+            "process_single_report", "save_openpyxl", "save_fast_fill")}
+        data_folder = self.paths["data_folder"]
+        output_folder = self.paths["output_folder"]
+        processor.refresh_data_file_index(data_folder)
+
+        for report_path in report_files:
+            file_name = os.path.basename(report_path)
+            address = processor.utils.extract_address_from_filename(file_name)
+
+            label_index, elapsed = timed(processor._prescan_report, report_path)
+            stages["prescan"].append(elapsed)
+            (has_gas, _), elapsed = timed(processor._detect_gas_in_report, label_index)
+            stages["gas_detection"].append(elapsed)
+
+            start = time.perf_counter()
+            data_file_path = processor._find_data_file_for_address(data_folder, address)
+            full_data = dict(processor._read_data_file(data_file_path)) if data_file_path else {}
+            stages["data_file"].append(time.perf_counter() - start)
+            full_data.update(processor.commission_manager.get_commission_composition(address, has_gas) or {})
+
+            _, elapsed = timed(processor._prepare_field_matching, label_index, full_data, file_name)
+            stages["field_matching"].append(elapsed)
+
+            workbook, elapsed = timed(load_workbook, report_path)
+            stages["full_load"].append(elapsed)
+
+            result, elapsed = timed(processor.process_single_report, report_path, data_folder, output_folder)
+            stages["process_single_report"].append(elapsed)
+
+            # Сохранение: полная пересборка книги и быстрое заполнение того же набора ячеек
+            filled_path = os.path.join(output_folder, f"{os.path.splitext(file_name)[0]}_FILLED.xlsx")
+            if result["status"] == "Успешно" and os.path.exists(filled_path):
+                filled_sheet = load_workbook(filled_path).active
+                source_cells = workbook.active._cells
+                written_cells = {
+                    coords: cell.value for coords, cell in filled_sheet._cells.items()
+                    if cell.value is not None
+                    and (coords not in source_cells or source_cells[coords].value != cell.value)
+                }
+                bench_path = os.path.join(output_folder, "_bench_save.xlsx")
+                _, elapsed = timed(workbook.save, bench_path)
+                stages["save_openpyxl"].append(elapsed)
+                _, elapsed = timed(XlsxCellPatcher(report_path).write, bench_path, written_cells,
+                                   workbook.index(workbook.active))
+                stages["save_fast_fill"].append(elapsed)
+                os.remove(bench_path)
+        return {name: summarize(samples) for name, samples in stages.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности заполнения паспортов на синтетических данных")
+    parser.add_argument("--sizes", default="281", help="Размеры наборов через запятую, например 281,1000,10000")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "ozp_benchmarks"),
+                        help="Папка для синтетических наборов")
+    parser.add_argument("--output", default="benchmark_results.json", help="Файл результатов (JSON)")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов для process_all_reports")
+    parser.add_argument("--fast-fill", action="store_true", help="Сохранять отчёты быстрым заполнением")
+    parser.add_argument("--sample", type=int, default=20, help="Число отчётов для замера отдельных этапов")
+    parser.add_argument("--data-format", choices=("xlsx", "csv"), default="xlsx", help="Формат файлов данных")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора")
+    parser.add_argument("--label", default="", help="Метка прогона (например, имя ветки)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "openpyxl": openpyxl.__version__,
+            "rapidfuzz": utils_module.rapidfuzz_process is not None,
+        },
+        "runs": [],
+    }
+    for size in sizes:
+        runner = BenchmarkRunner(args.workdir, size, workers=args.workers, fast_fill=args.fast_fill,
+                                 sample=args.sample, data_format=args.data_format, seed=args.seed)
+        run = runner.run()
+        report["runs"].append(run)
+        print(f"{size} отчётов: scan_reports {run['scan_reports_s']:.3f} с, "
+              f"process_all_reports {run['process_all_reports_s']:.2f} с ({run['per_report_s']:.3f} с на отчёт), "
+              f"статусы {run['statuses']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
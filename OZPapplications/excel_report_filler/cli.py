@@ -0,0 +1,157 @@
+"""
+Пакетное заполнение паспортов без графического интерфейса (например, по расписанию cron).
+
+Примеры:
+    python cli.py --config config.ini
+    python cli.py --reports /data/passports --data /data/volumes --output /data/filled --workers 0 --format json
+
+Папки и файлы комиссий по умолчанию берутся из config.ini ([Paths]).
+Тяжёлые модули (pandas, openpyxl, обработка отчётов) импортируются только тогда,
+когда есть что обрабатывать, поэтому пустой запуск завершается быстро.
+
+Код возврата: 0 - все отчёты обработаны, 1 - были отчёты с ошибками, 2 - ошибка параметров или настроек.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from config_manager import ConfigManager
+
+
+LOG_LEVELS = ["debug", "info", "success", "warning", "error"]
+REPORT_EXTENSIONS = ('.xlsx', '.xls') # Как в ReportProcessor.scan_reports
+
+
+class ConsoleLog:
+    """Вывод журнала в stderr (stdout остаётся для итогов в формате text/json)."""
+    def __init__(self, min_level="info"):
+        self.min_level = LOG_LEVELS.index(min_level)
+
+    def __call__(self, message, level="info"):
+        level_index = LOG_LEVELS.index(level) if level in LOG_LEVELS else LOG_LEVELS.index("info")
+        if level_index < self.min_level:
+            return
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] [{level.upper()}] {message}", file=sys.stderr, flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетное заполнение паспортов готовности без графического интерфейса")
+    parser.add_argument("--config", default="config.ini", help="Файл настроек (по умолчанию config.ini)")
+    parser.add_argument("--reports", help="Папка с отчётами (по умолчанию [Paths] reports_folder)")
+    parser.add_argument("--data", help="Папка с файлами данных (по умолчанию [Paths] data_folder)")
+    parser.add_argument("--output", help="Папка для заполненных отчётов (по умолчанию [Paths] output_folder)")
+    parser.add_argument("--commission-types", help="Файл типов комиссий (по умолчанию [Paths] commission_types_file)")
+    parser.add_argument("--address-map", help="Файл сопоставления адресов (по умолчанию [Paths] address_map_file)")
+    parser.add_argument("--workers", type=int, help="Число процессов (0 - по числу ядер; по умолчанию [Processing] workers)")
+    parser.add_argument("--fast-fill", action="store_true", help="Быстрое заполнение: правка XML листа вместо пересборки книги")
+    parser.add_argument("--incremental", action="store_true", help="Пропускать отчёты, которые не изменились с прошлого успешного заполнения")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="Формат итогов в stdout")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="info", help="Минимальный уровень сообщений журнала (stderr)")
+    parser.add_argument("--dry-run", action="store_true", help="Только найти отчёты, ничего не заполнять")
+    return parser.parse_args(argv)
+
+
+def find_report_files(reports_folder):
+    """Находит файлы отчётов так же, как ReportProcessor.scan_reports, но без импорта обработки."""
+    report_files = []
+    for root, _, files in os.walk(reports_folder):
+        for file in files:
+            if file.lower().endswith(REPORT_EXTENSIONS):
+                report_files.append(os.path.join(root, file))
+    return report_files
+
+
+def print_summary(results, output_format, elapsed):
+    statuses = {}
+    for res in results:
+        statuses[res["status"]] = statuses.get(res["status"], 0) + 1
+    if output_format == "json":
+        summary = {
+            "reports": len(results),
+            "statuses": statuses,
+            "elapsed_s": round(elapsed, 3),
+            "results": [{k: v for k, v in res.items() if k != "profile_stats"} for res in results],
+        }
+        print(json.dumps(summary, ensure_ascii=False, indent=1))
+    else:
+        print(f"Обработано отчётов: {len(results)} за {elapsed:.1f} с")
+        for status, count in sorted(statuses.items()):
+            print(f"  {status}: {count}")
+        for res in results:
+            if res["status"] == "Ошибка":
+                print(f"  Ошибка: {res['file']} - {res['message']}")
+
+
+def print_dry_run(report_files, output_format):
+    """Итоги --dry-run: найденные отчёты без обработки."""
+    if output_format == "json":
+        print(json.dumps({"reports": len(report_files), "dry_run": True, "files": report_files}, ensure_ascii=False, indent=1))
+    else:
+        print(f"Найдено отчётов: {len(report_files)} (пробный запуск, ничего не заполнено)")
+        for path in report_files:
+            print(f"  {path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = ConsoleLog(args.log_level)
+
+    if not os.path.exists(args.config):
+        log(f"Файл настроек не найден: {args.config}", level="error")
+        return 2
+    config_manager = ConfigManager(args.config)
+    if args.workers is not None:
+        config_manager.set('Processing', 'workers', str(args.workers))
+    if args.fast_fill:
+        config_manager.set('Processing', 'fast_fill', 'true')
+    if args.incremental:
+        config_manager.set('Processing', 'incremental', 'true')
+
+    reports_folder = args.reports or config_manager.get('Paths', 'reports_folder')
+    data_folder = args.data or config_manager.get('Paths', 'data_folder')
+    output_folder = args.output or config_manager.get('Paths', 'output_folder')
+    for name, folder in (("отчётами", reports_folder), ("данными", data_folder)):
+        if not folder or not os.path.isdir(folder):
+            log(f"Папка с {name} не найдена: {folder}", level="error")
+            return 2
+
+    report_files = find_report_files(reports_folder)
+    log(f"Найдено {len(report_files)} файлов отчётов в {reports_folder}", level="info")
+    if args.dry_run:
+        print_dry_run(report_files, args.format)
+        return 0
+    if not report_files:
+        print_summary([], args.format, 0.0)
+        return 0
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Тяжёлые модули нужны только для реальной обработки
+    from commission_manager import CommissionManager
+    from report_processor import ReportProcessor
+    from utils import Utils
+
+    # Файлы из config.ini CommissionManager загружает сам; повторно загружаем только переданные явно
+    commission_manager = CommissionManager(config_manager, log)
+    if args.commission_types:
+        commission_manager.load_commission_types(args.commission_types)
+    if args.address_map:
+        commission_manager.load_address_commission_map(args.address_map)
+
+    processor = ReportProcessor(config_manager, commission_manager, Utils(config_manager), log)
+    processor.report_files = report_files
+    started = time.perf_counter()
+    results = processor.process_all_reports(reports_folder, data_folder, output_folder) or []
+    elapsed = time.perf_counter() - started
+
+    print_summary(results, args.format, elapsed)
+    return 1 if any(res["status"] == "Ошибка" for res in results) else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,13 +1,29 @@
 import pandas as pd
+import csv
 import os
 import re
+import sqlite3
+from openpyxl import Workbook, load_workbook
+
+from address_resolver import AddressResolver
+from data_file_cache import DataFileCache
+from commission_store import CommissionStore
+
+GAS_TRUE_VALUES = ('да', 'true', 'есть')
+IMPORT_CHUNK_ROWS = 5000 # Строк файла сопоставления адресов, читаемых за один раз
 
 class CommissionManager:
     """
     Управляет данными о комиссиях: их составом по районам и наличию газа,
     а также сопоставлением адресов с типами комиссий.
+    При [Storage] backend = sqlite данные хранятся в базе (CommissionStore): при запуске
+    читаются из неё, изменения сохраняются сразу, загрузка файла Excel/CSV заменяет данные в базе.
     """
-    def __init__(self, config_manager=None, log_callback=None):
+    def __init__(self, config_manager=None, log_callback=None, load_data=True):
+        """
+        `load_data=False` - не открывать базу и не загружать файлы из настроек: данные задаются
+        извне (так делают процессы пула ReportProcessor), а настройки используются только для поиска.
+        """
         self.config_manager = config_manager
         self.log_message = log_callback if log_callback else print
 
@@ -15,106 +31,296 @@ class CommissionManager:
         self.commission_types = {}
         # address_to_commission_map: {address: (район, has_gas)}
         self.address_to_commission_map = {}
+        # Поиск адреса с учётом разного написания (строится по address_to_commission_map)
+        self.address_resolver = None
+
+        # Кэш разобранных файлов комиссий: при неизменном файле повторный запуск не читает Excel
+        cache_folder = None
+        if config_manager and config_manager.get_bool('Cache', 'commission_cache_on_disk', True):
+            cache_folder = config_manager.get_cache_path('commission_cache')
+        self.commission_types_cache = DataFileCache(
+            max_memory_mb=16, disk_folder=os.path.join(cache_folder, 'types') if cache_folder else None,
+            log_callback=self.log_message)
+        self.address_map_cache = DataFileCache(
+            max_memory_mb=16, disk_folder=os.path.join(cache_folder, 'address_map') if cache_folder else None,
+            log_callback=self.log_message)
+
+        # Хранилище в SQLite (необязательное)
+        self.store = None
+        if not load_data:
+            return
+        if config_manager and config_manager.get('Storage', 'backend', 'excel') == 'sqlite':
+            db_path = config_manager.get('Storage', 'database', 'commission_store.sqlite')
+            if not os.path.isabs(db_path):
+                db_path = config_manager.get_cache_path(db_path)
+            try:
+                self.store = CommissionStore(db_path)
+            except sqlite3.Error as e:
+                self.log_message(f"Не удалось открыть базу комиссий {db_path}: {e}. Данные будут загружены из файлов.", level="error")
 
         self._load_initial_data()
 
     def _load_initial_data(self):
-        """Загружает данные комиссий и сопоставлений при инициализации."""
+        """
+        Загружает данные комиссий и сопоставлений при инициализации.
+        Каждая таблица читается из базы, если в базе она не пуста (файл Excel при этом не разбирается),
+        иначе - из файла, указанного в настройках (в базу он попадает при загрузке, см. load_*).
+        """
+        types_file = map_file = None
         if self.config_manager:
             types_file = self.config_manager.get('Paths', 'commission_types_file')
-            if types_file and os.path.exists(types_file):
-                self.load_commission_types(types_file)
-
             map_file = self.config_manager.get('Paths', 'address_map_file')
-            if map_file and os.path.exists(map_file):
-                self.load_address_commission_map(map_file)
+
+        if self.store and not self.store.is_empty('commission_types'):
+            self.commission_types = self.store.load_commission_types()
+            self.log_message(f"Загружено {len(self.commission_types)} типов комиссий из базы {self.store.db_path}", level="success")
+            self._warn_if_newer_than_store(types_file, "типов комиссий")
+        elif types_file and os.path.exists(types_file):
+            self.load_commission_types(types_file)
+
+        if self.store and not self.store.is_empty('address_map'):
+            self.address_to_commission_map = self.store.load_address_map()
+            self.log_message(f"Загружено {len(self.address_to_commission_map)} сопоставлений адресов из базы {self.store.db_path}", level="success")
+            self._warn_if_newer_than_store(map_file, "сопоставления адресов")
+        elif map_file and os.path.exists(map_file):
+            self.load_address_commission_map(map_file)
+
+    def _warn_if_newer_than_store(self, file_path, description):
+        """Предупреждает, что файл из настроек изменён после последней записи в базу и не был в неё загружен."""
+        if not file_path or not os.path.exists(file_path):
+            return
+        if os.path.getmtime(file_path) > self.store.last_modified():
+            self.log_message(
+                f"Файл {description} {file_path} изменён после последнего обновления базы {self.store.db_path}. "
+                f"Используются данные из базы; чтобы применить изменения файла, загрузите его заново.", level="warning"
+            )
 
     def load_commission_types(self, file_path):
         """
         Загружает типы комиссий из Excel/CSV файла.
         Ожидаемый формат: колонки "Район", "Газ", и далее колонки с ролями
         и должностями (например, "Председатель", "Должность Председателя", "Член 1", и т.д.).
+        Разобранный файл кэшируется (в памяти и на диске) по пути, размеру и времени изменения.
         """
         if not os.path.exists(file_path):
             self.log_message(f"Файл типов комиссий не найден: {file_path}", level="error")
             return False
 
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8')
-            else:
-                df = pd.read_excel(file_path)
-
-            new_commission_types = {}
-            for index, row in df.iterrows():
-                try:
-                    region = str(row['Район']).strip()
-                    has_gas_str = str(row['Газ']).strip().lower()
-                    has_gas = (has_gas_str == 'да' or has_gas_str == 'true' or has_gas_str == 'есть')
-
-                    commission_key = (region, has_gas)
-                    composition = {}
-                    for col in df.columns:
-                        if col not in ['Район', 'Газ'] and pd.notna(row[col]):
-                            composition[col.strip()] = str(row[col]).strip()
-                    new_commission_types[commission_key] = composition
-                except KeyError as ke:
-                    self.log_message(f"Ошибка в файле типов комиссий: отсутствует обязательная колонка {ke} в строке {index+2}. Пропустил строку.", level="warning")
-                except Exception as e:
-                    self.log_message(f"Ошибка обработки строки {index+2} в файле типов комиссий: {e}. Пропустил строку.", level="error")
-
-            self.commission_types = new_commission_types
-            self.log_message(f"Загружено {len(self.commission_types)} типов комиссий из {file_path}", level="success")
+            misses_before = self.commission_types_cache.misses
+            new_commission_types = self.commission_types_cache.get(file_path, self._parse_commission_types)
+            if not new_commission_types:
+                # Пустой файл не должен стирать текущие данные (и данные в базе)
+                self.log_message(f"Файл типов комиссий {file_path} не содержит строк. Данные не изменены.", level="warning")
+                return False
+            # Словари из кэша общие, а типы комиссий меняются через интерфейс - берём копию
+            self.commission_types = {key: dict(composition) for key, composition in new_commission_types.items()}
+            from_cache = " (из кэша)" if self.commission_types_cache.misses == misses_before else ""
+            self.log_message(f"Загружено {len(self.commission_types)} типов комиссий из {file_path}{from_cache}", level="success")
+            self._store_call("импорт типов комиссий", lambda store: store.replace_commission_types(self.commission_types))
             return True
         except Exception as e:
             self.log_message(f"Ошибка при загрузке файла типов комиссий {file_path}: {e}", level="error")
             return False
 
+    def _parse_commission_types(self, file_path):
+        """Разбирает файл типов комиссий по колонкам (без построчного перебора DataFrame)."""
+        df = self._read_table(file_path)
+        missing = [col for col in ('Район', 'Газ') if col not in df.columns]
+        if missing:
+            # Исключение, а не пустой результат: ошибка не попадает в кэш и не заменяет данные в базе
+            raise ValueError(f"отсутствуют обязательные колонки {missing}")
+
+        regions = df['Район'].map(str).str.strip().tolist()
+        gas_flags = self._gas_flags(df['Газ'])
+        role_columns = [col for col in df.columns if col not in ['Район', 'Газ']]
+        role_names = [str(col).strip() for col in role_columns]
+        roles = df[role_columns]
+        present = roles.notna().to_numpy()
+        values = roles.to_numpy(dtype=object)
+
+        new_commission_types = {}
+        for i, commission_key in enumerate(zip(regions, gas_flags)):
+            new_commission_types[commission_key] = {
+                role_names[j]: str(values[i, j]).strip() for j in range(len(role_names)) if present[i, j]
+            }
+        return new_commission_types
+
     def load_address_commission_map(self, file_path):
         """
         Загружает сопоставление адресов с типами комиссий из Excel/CSV файла.
         Ожидаемый формат: колонки "Адрес", "Район", "Газ".
+        Разобранный файл кэшируется (в памяти и на диске) по пути, размеру и времени изменения.
         """
         if not os.path.exists(file_path):
             self.log_message(f"Файл сопоставления адресов не найден: {file_path}", level="error")
             return False
 
         try:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8')
-            else:
-                df = pd.read_excel(file_path)
-
-            new_address_map = {}
-            for index, row in df.iterrows():
-                try:
-                    address = str(row['Адрес']).strip()
-                    region = str(row['Район']).strip()
-                    has_gas_str = str(row['Газ']).strip().lower()
-                    has_gas = (has_gas_str == 'да' or has_gas_str == 'true' or has_gas_str == 'есть')
-
-                    if address in new_address_map:
-                        self.log_message(f"Дубликат адреса '{address}' в файле сопоставления адресов (строка {index+2}). Будет использована последняя запись.", level="warning")
-                    new_address_map[address] = (region, has_gas)
-                except KeyError as ke:
-                    self.log_message(f"Ошибка в файле сопоставления адресов: отсутствует обязательная колонка {ke} в строке {index+2}. Пропустил строку.", level="warning")
-                except Exception as e:
-                    self.log_message(f"Ошибка обработки строки {index+2} в файле сопоставления адресов: {e}. Пропустил строку.", level="error")
-
-            self.address_to_commission_map = new_address_map
-            self.log_message(f"Загружено {len(self.address_to_commission_map)} сопоставлений адресов из {file_path}", level="success")
+            misses_before = self.address_map_cache.misses
+            new_address_map = self.address_map_cache.get(file_path, self._parse_address_commission_map)
+            if not new_address_map:
+                # Пустой файл не должен стирать текущие данные (и данные в базе)
+                self.log_message(f"Файл сопоставления адресов {file_path} не содержит строк. Данные не изменены.", level="warning")
+                return False
+            self.address_to_commission_map = dict(new_address_map) # Копия: словарь из кэша общий
+            from_cache = " (из кэша)" if self.address_map_cache.misses == misses_before else ""
+            self.log_message(f"Загружено {len(self.address_to_commission_map)} сопоставлений адресов из {file_path}{from_cache}", level="success")
+            self._store_call("импорт сопоставлений адресов", lambda store: store.replace_address_map(self.address_to_commission_map))
             return True
         except Exception as e:
             self.log_message(f"Ошибка при загрузке файла сопоставления адресов {file_path}: {e}", level="error")
             return False
 
+    def _parse_address_commission_map(self, file_path):
+        """
+        Разбирает файл сопоставления адресов порциями по IMPORT_CHUNK_ROWS строк (без DataFrame),
+        поэтому память не зависит от размера файла сверх самого словаря. Строки без адреса пропускаются.
+        """
+        chunks = self._iter_table_chunks(file_path)
+        header = next(chunks, [])
+        missing = [col for col in ('Адрес', 'Район', 'Газ') if col not in header]
+        if missing:
+            chunks.close() # Закрывает файл
+            # Исключение, а не пустой результат: ошибка не попадает в кэш и не заменяет данные в базе
+            raise ValueError(f"отсутствуют обязательные колонки {missing}")
+        address_col, region_col, gas_col = (header.index(col) for col in ('Адрес', 'Район', 'Газ'))
+
+        new_address_map = {}
+        row_number = 1 # Строка файла (заголовок - первая)
+        for chunk in chunks:
+            for row in chunk:
+                row_number += 1
+                address = self._cell_text(row[address_col])
+                if not address:
+                    continue
+                if address in new_address_map:
+                    self.log_message(f"Дубликат адреса '{address}' в файле сопоставления адресов (строка {row_number}). Будет использована последняя запись.", level="warning")
+                # При повторах адреса, как и раньше, остаётся последняя запись
+                new_address_map[address] = (self._cell_text(row[region_col]), self._cell_text(row[gas_col]).lower() in GAS_TRUE_VALUES)
+        return new_address_map
+
+    @staticmethod
+    def _iter_table_chunks(file_path, chunk_rows=IMPORT_CHUNK_ROWS):
+        """
+        Читает первую таблицу файла (.xlsx - потоково openpyxl read_only, .csv - модулем csv, иначе pandas).
+        Генератор: первым отдаёт заголовок (список строк), затем списки строк порциями;
+        строки дополнены до длины заголовка. Файл закрывается по окончании или при close() генератора.
+        """
+        close = None
+        if file_path.lower().endswith('.csv'):
+            f = open(file_path, newline='', encoding='utf-8-sig')
+            rows = csv.reader(f)
+            close = f.close
+        elif file_path.lower().endswith(('.xlsx', '.xlsm')):
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            close = workbook.close # В режиме read_only файл остаётся открытым до close()
+        else:
+            df = pd.read_excel(file_path, header=None, dtype=object)
+            rows = (tuple(None if pd.isna(value) else value for value in row) for row in df.itertuples(index=False))
+
+        try:
+            header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+            yield header
+            width = len(header)
+            chunk = []
+            for row in rows:
+                if not any(value not in (None, "") for value in row):
+                    continue # Пустые строки (read_only отдаёт их в конце листа)
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            if close:
+                close()
+
+    @staticmethod
+    def _cell_text(value):
+        return "" if value is None else str(value).strip()
+
+    @staticmethod
+    def _read_table(file_path):
+        if file_path.endswith('.csv'):
+            return pd.read_csv(file_path, encoding='utf-8')
+        return pd.read_excel(file_path)
+
+    @staticmethod
+    def _gas_flags(column):
+        """Колонка "Газ" -> список bool ("да", "true", "есть" - есть газ)."""
+        return column.map(str).str.strip().str.lower().isin(GAS_TRUE_VALUES).tolist()
+
+    def _store_call(self, description, operation):
+        """Выполняет операцию с базой (если она подключена); ошибку базы записывает в журнал."""
+        if self.store is None:
+            return None
+        try:
+            return operation(self.store)
+        except sqlite3.Error as e:
+            self.log_message(f"Ошибка базы комиссий ({description}): {e}", level="error")
+            return None
+
+    def find_addresses(self, prefix="", region=None, has_gas=None, limit=100):
+        """
+        Сопоставления, адрес которых начинается с `prefix` (без учёта регистра), с отбором по району и газу.
+        Возвращает список (адрес, район, есть газ). С базой запрос идёт по индексу.
+        """
+        if self.store is not None:
+            found = self._store_call("поиск адресов", lambda store: store.find_addresses(prefix, region, has_gas, limit))
+            if found is not None:
+                return found
+        key = prefix.lower().replace("ё", "е")
+        found = [
+            (address, map_region, map_gas) for address, (map_region, map_gas) in self.address_to_commission_map.items()
+            if address.lower().replace("ё", "е").startswith(key)
+            and (region is None or map_region == region) and (has_gas is None or map_gas == bool(has_gas))
+        ]
+        return sorted(found, key=lambda item: item[0].lower().replace("ё", "е"))[:limit]
+
+    def _get_address_resolver(self):
+        """Возвращает индекс адресов; перестраивает его, если словарь сопоставлений был заменён целиком."""
+        if self.address_resolver is None or self.address_resolver.source is not self.address_to_commission_map:
+            threshold = self.config_manager.get_int('Processing', 'address_match_threshold', 85) if self.config_manager else 85
+            self.address_resolver = AddressResolver(self.address_to_commission_map, threshold=threshold)
+            self.address_resolver.source = self.address_to_commission_map
+        return self.address_resolver
+
+    def resolve_address(self, address):
+        """
+        Находит адрес из файла сопоставления, соответствующий `address` (точно, после нормализации или нечётко).
+        Возвращает (адрес из файла сопоставления, уверенность 0..100, способ) или (None, 0, None).
+        """
+        if not address:
+            return None, 0, None
+        return self._get_address_resolver().resolve(address)
+
+    def commission_fingerprint(self, address):
+        """
+        Данные комиссий, от которых зависит заполнение отчёта по адресу: найденный адрес, район
+        и составы комиссии района с газом и без (для каталога отчётов, см. ReportProcessor).
+        """
+        matched_address, _, _ = self.resolve_address(address)
+        if matched_address is None:
+            return None
+        region, has_gas = self.address_to_commission_map[matched_address]
+        return [matched_address, region, has_gas,
+                self.commission_types.get((region, True)), self.commission_types.get((region, False))]
+
     def get_commission_composition(self, address, has_gas):
         """
         Возвращает состав комиссии для данного адреса и наличия газа.
         Сначала пытается найти по адресу, затем по типу комиссии из map.
         """
-        # Пытаемся найти район по адресу
-        if address in self.address_to_commission_map:
+        # Пытаемся найти район по адресу (с учётом разного написания адреса)
+        matched_address, confidence, method = self.resolve_address(address)
+        if matched_address is not None and method != "exact":
+            self.log_message(f"Адрес '{address}' сопоставлен с '{matched_address}' ({'после нормализации' if method == 'normalized' else f'нечётко, {confidence}%'}).", level="info")
+            address = matched_address
+        if matched_address is not None:
             region, gas_status_from_map = self.address_to_commission_map[address]
             # Используем gas_status_from_map, если он надежнее, или переданный has_gas
             # В данном случае, используем переданный has_gas, так как он извлечен из самого отчета.
@@ -159,6 +365,7 @@ class CommissionManager:
         if commission_key in self.commission_types:
             self.log_message(f"Тип комиссии для {commission_key} уже существует. Обновляю.", level="warning")
         self.commission_types[commission_key] = composition
+        self._store_call("сохранение типа комиссии", lambda store: store.save_commission_type(region, has_gas, composition))
         self.log_message(f"Добавлен/обновлен тип комиссии: {commission_key}", level="info")
 
     def delete_commission_type(self, region, has_gas):
@@ -166,6 +373,7 @@ class CommissionManager:
         commission_key = (region, has_gas)
         if commission_key in self.commission_types:
             del self.commission_types[commission_key]
+            self._store_call("удаление типа комиссии", lambda store: store.delete_commission_type(region, has_gas))
             self.log_message(f"Удален тип комиссии: {commission_key}", level="info")
             return True
         self.log_message(f"Тип комиссии для {commission_key} не найден для удаления.", level="warning")
@@ -176,40 +384,38 @@ class CommissionManager:
         if address in self.address_to_commission_map:
             self.log_message(f"Сопоставление для адреса '{address}' уже существует. Обновляю.", level="warning")
         self.address_to_commission_map[address] = (region, has_gas)
+        if self.address_resolver is not None and self.address_resolver.source is self.address_to_commission_map:
+            self.address_resolver.add(address)
+        self._store_call("сохранение сопоставления адреса", lambda store: store.save_address(address, region, has_gas))
         self.log_message(f"Добавлено/обновлено сопоставление для адреса: {address} -> ({region}, {has_gas})", level="info")
 
     def delete_address_map(self, address):
         """Удаляет сопоставление адреса."""
         if address in self.address_to_commission_map:
             del self.address_to_commission_map[address]
+            if self.address_resolver is not None and self.address_resolver.source is self.address_to_commission_map:
+                self.address_resolver.remove(address)
+            self._store_call("удаление сопоставления адреса", lambda store: store.delete_address(address))
             self.log_message(f"Удалено сопоставление для адреса: {address}", level="info")
             return True
         self.log_message(f"Сопоставление для адреса '{address}' не найдено для удаления.", level="warning")
         return False
 
     def export_commission_types(self, file_path):
-        """Экспортирует текущие типы комиссий в Excel/CSV."""
+        """Экспортирует текущие типы комиссий в Excel/CSV (строки пишутся сразу, без DataFrame)."""
         try:
-            data = []
-            # Собираем все возможные роли/должности, чтобы создать столбцы DataFrame
+            # Собираем все возможные роли/должности, чтобы создать столбцы
             all_roles = set()
             for comp in self.commission_types.values():
                 all_roles.update(comp.keys())
+            # Ключевые столбцы идут первыми
+            roles = sorted(all_roles - {"Район", "Газ"})
 
-            for (region, has_gas), composition in self.commission_types.items():
-                row = {"Район": region, "Газ": "Да" if has_gas else "Нет"}
-                row.update(composition)
-                data.append(row)
-
-            df = pd.DataFrame(data)
-            # Убедимся, что ключевые столбцы идут первыми
-            cols = ["Район", "Газ"] + sorted([c for c in df.columns if c not in ["Район", "Газ"]])
-            df = df[cols]
-
-            if file_path.endswith('.csv'):
-                df.to_csv(file_path, index=False, encoding='utf-8')
-            else:
-                df.to_excel(file_path, index=False)
+            rows = (
+                [region, "Да" if has_gas else "Нет"] + [composition.get(role) for role in roles]
+                for (region, has_gas), composition in self.commission_types.items()
+            )
+            self._write_table(file_path, ["Район", "Газ"] + roles, rows)
             self.log_message(f"Типы комиссий успешно экспортированы в {file_path}", level="success")
             return True
         except Exception as e:
@@ -217,18 +423,34 @@ class CommissionManager:
             return False
 
     def export_address_map(self, file_path):
-        """Экспортирует текущие сопоставления адресов в Excel/CSV."""
+        """Экспортирует текущие сопоставления адресов в Excel/CSV (строки пишутся сразу, без DataFrame)."""
         try:
-            data = []
-            for address, (region, has_gas) in self.address_to_commission_map.items():
-                data.append({"Адрес": address, "Район": region, "Газ": "Да" if has_gas else "Нет"})
-            df = pd.DataFrame(data)
-            if file_path.endswith('.csv'):
-                df.to_csv(file_path, index=False, encoding='utf-8')
-            else:
-                df.to_excel(file_path, index=False)
+            rows = (
+                (address, region, "Да" if has_gas else "Нет")
+                for address, (region, has_gas) in self.address_to_commission_map.items()
+            )
+            self._write_table(file_path, ["Адрес", "Район", "Газ"], rows)
             self.log_message(f"Сопоставления адресов успешно экспортированы в {file_path}", level="success")
             return True
         except Exception as e:
             self.log_message(f"Ошибка при экспорте сопоставлений адресов: {e}", level="error")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def _write_table(file_path, header, rows):
+        """
+        Записывает таблицу построчно: CSV - модулем csv, Excel - книгой openpyxl в режиме write_only
+        (строки сразу уходят во временный файл и не держатся в памяти).
+        """
+        if file_path.endswith('.csv'):
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+            return
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(file_path)
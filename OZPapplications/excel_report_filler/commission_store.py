@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+
+
+class CommissionStore:
+    """
+    Хранилище типов комиссий и сопоставлений адресов во встроенной базе SQLite.
+    Используется CommissionManager при [Storage] backend = sqlite: данные читаются из базы
+    без разбора Excel, а добавление, изменение и удаление сохраняются сразу (каждое - своей транзакцией).
+    Импорт из Excel/CSV заменяет таблицу целиком одной транзакцией.
+
+    Сопоставления индексированы по адресу (поиск по началу адреса без учёта регистра),
+    району и наличию газа. Порядок строк - порядок добавления, как в файлах Excel.
+    Соединение можно использовать из разных потоков (обращения сериализуются блокировкой).
+    """
+    TABLES = ("commission_types", "address_map")
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS commission_types (
+            region TEXT NOT NULL,
+            has_gas INTEGER NOT NULL,
+            composition TEXT NOT NULL,
+            PRIMARY KEY (region, has_gas)
+        );
+        CREATE TABLE IF NOT EXISTS address_map (
+            id INTEGER PRIMARY KEY,
+            address TEXT NOT NULL UNIQUE,
+            search_key TEXT NOT NULL,
+            region TEXT NOT NULL,
+            has_gas INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS address_map_search_key ON address_map(search_key);
+        CREATE INDEX IF NOT EXISTS address_map_region_gas ON address_map(region, has_gas);
+    """
+
+    def __init__(self, db_path):
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    @staticmethod
+    def _search_key(address):
+        # lower() в SQLite не работает с кириллицей, поэтому ключ поиска хранится готовым
+        return str(address).lower().replace("ё", "е")
+
+    def is_empty(self, table):
+        """Пуста ли таблица: "commission_types" или "address_map"."""
+        if table not in self.TABLES:
+            raise ValueError(f"Неизвестная таблица: {table}")
+        with self._lock:
+            return self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+    def last_modified(self):
+        """Время последнего изменения файла базы (os.path.getmtime)."""
+        return os.path.getmtime(self.db_path)
+
+    # --- Чтение ---
+    def load_commission_types(self):
+        """Возвращает {(район, есть газ): состав}."""
+        with self._lock:
+            rows = self.connection.execute("SELECT region, has_gas, composition FROM commission_types ORDER BY rowid").fetchall()
+        return {(region, bool(has_gas)): json.loads(composition) for region, has_gas, composition in rows}
+
+    def load_address_map(self):
+        """Возвращает {адрес: (район, есть газ)} в порядке добавления."""
+        with self._lock:
+            rows = self.connection.execute("SELECT address, region, has_gas FROM address_map ORDER BY id").fetchall()
+        return {address: (region, bool(has_gas)) for address, region, has_gas in rows}
+
+    def find_addresses(self, prefix="", region=None, has_gas=None, limit=100):
+        """
+        Сопоставления, адрес которых начинается с `prefix` (без учёта регистра), с отбором
+        по району и газу. Возвращает список (адрес, район, есть газ).
+        """
+        conditions, params = [], []
+        if prefix:
+            key = self._search_key(prefix)
+            conditions.append("search_key >= ? AND search_key < ?")
+            params.extend([key, key + "\U0010ffff"]) # Диапазон по индексу вместо LIKE
+        if region is not None:
+            conditions.append("region = ?")
+            params.append(region)
+        if has_gas is not None:
+            conditions.append("has_gas = ?")
+            params.append(int(bool(has_gas)))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT address, region, has_gas FROM address_map {where} ORDER BY search_key LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [(address, region, bool(gas)) for address, region, gas in rows]
+
+    # --- Изменение ---
+    def save_commission_type(self, region, has_gas, composition):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO commission_types (region, has_gas, composition) VALUES (?, ?, ?) "
+                "ON CONFLICT(region, has_gas) DO UPDATE SET composition = excluded.composition",
+                (region, int(bool(has_gas)), json.dumps(composition, ensure_ascii=False))
+            )
+
+    def delete_commission_type(self, region, has_gas):
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM commission_types WHERE region = ? AND has_gas = ?", (region, int(bool(has_gas)))
+            )
+        return cursor.rowcount > 0
+
+    def save_address(self, address, region, has_gas):
+        """Добавляет сопоставление или обновляет существующее (с сохранением его места в порядке)."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO address_map (address, search_key, region, has_gas) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(address) DO UPDATE SET region = excluded.region, has_gas = excluded.has_gas",
+                (address, self._search_key(address), region, int(bool(has_gas)))
+            )
+
+    def delete_address(self, address):
+        with self._lock, self.connection:
+            cursor = self.connection.execute("DELETE FROM address_map WHERE address = ?", (address,))
+        return cursor.rowcount > 0
+
+    # --- Массовый импорт ---
+    def replace_commission_types(self, commission_types):
+        """Заменяет все типы комиссий одной транзакцией."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM commission_types")
+            self.connection.executemany(
+                "INSERT INTO commission_types (region, has_gas, composition) VALUES (?, ?, ?)",
+                ((region, int(bool(has_gas)), json.dumps(composition, ensure_ascii=False))
+                 for (region, has_gas), composition in commission_types.items())
+            )
+
+    def replace_address_map(self, address_map):
+        """Заменяет все сопоставления адресов одной транзакцией."""
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM address_map")
+            self.connection.executemany(
+                "INSERT INTO address_map (address, search_key, region, has_gas) VALUES (?, ?, ?, ?)",
+                ((address, self._search_key(address), region, int(bool(has_gas)))
+                 for address, (region, has_gas) in address_map.items())
+            )
@@ -39,6 +39,40 @@ class ConfigManager:
             }
         if 'FieldMapping' not in self.config:
             self.config['FieldMapping'] = {} # Для ручных сопоставлений полей
+        if 'Processing' not in self.config:
+            self.config['Processing'] = {
+                'workers': '1', # Число процессов для пакетной обработки (0 - по числу ядер)
+                'data_file_reader': 'openpyxl', # Чтение .xlsx файлов данных: openpyxl (потоковое) или pandas
+                'prescan': 'true', # Предварительный просмотр отчёта (read_only) перед полной загрузкой
+                'fast_fill': 'false', # Запись значений прямо в XML листа вместо пересборки книги openpyxl
+                'address_match_threshold': '85', # Минимальная оценка (0..100) нечёткого совпадения адреса
+                'incremental': 'false' # Пропускать отчёты, которые не изменились с прошлого успешного заполнения
+            }
+        if 'Profiling' not in self.config:
+            self.config['Profiling'] = {
+                'enabled': 'false', # Профилировать (cProfile) каждый отчёт пакета
+                'slowest_reports': '5' # Сколько профилей самых медленных отчётов сохранить в папку profiles
+            }
+        if 'Logging' not in self.config:
+            self.config['Logging'] = {
+                'view_max_lines': '2000', # Сколько последних строк журнала держать в окне
+                'file': 'logs/report_filler.log', # Полный журнал на диске (пусто - не сохранять)
+                'file_max_mb': '5', # Размер файла журнала, после которого начинается новый
+                'file_backups': '3' # Сколько старых файлов журнала хранить
+            }
+        if 'Storage' not in self.config:
+            self.config['Storage'] = {
+                'backend': 'excel', # Где хранить комиссии и адреса: excel (файлы из [Paths]) или sqlite
+                'database': 'commission_store.sqlite' # База для backend = sqlite (относительно папки config.ini)
+            }
+        if 'Cache' not in self.config:
+            self.config['Cache'] = {
+                'template_cache': 'true', # Запоминать раскладку полей известных шаблонов отчётов
+                'data_cache_memory_mb': '64', # Объём кэша разобранных файлов данных в памяти
+                'data_cache_on_disk': 'false', # Сохранять разобранные файлы данных на диск между запусками
+                'commission_cache_on_disk': 'true', # Сохранять разобранные файлы комиссий и адресов (быстрый запуск)
+                'report_catalog': 'true' # Вести каталог обработанных отчётов (report_catalog.sqlite)
+            }
 
     def save_config(self):
         """Сохраняет текущие настройки в файл."""
@@ -52,6 +86,24 @@ class ConfigManager:
         """Получает значение настройки по секции и ключу."""
         return self.config.get(section, key, fallback=default)
 
+    def get_int(self, section, key, default=0):
+        """Получает целочисленное значение настройки; при ошибке возвращает default."""
+        try:
+            return int(self.get(section, key, default))
+        except ValueError:
+            return default
+
+    def get_bool(self, section, key, default=False):
+        """Получает логическое значение настройки (true/false, да/нет, 1/0)."""
+        value = self.get(section, key, '').strip().lower()
+        if not value:
+            return default
+        return value in ('1', 'true', 'yes', 'on', 'да')
+
+    def get_cache_path(self, file_name):
+        """Возвращает путь к служебному файлу кэша, расположенному рядом с файлом настроек."""
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_file)), file_name)
+
     def set(self, section, key, value):
         """Устанавливает значение настройки по секции и ключу."""
         if section not in self.config:
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+
+
+class DataFileCache:
+    """
+    Кэш разобранных файлов данных ({поле: значение}).
+    Ключ - (путь, размер, mtime) файла и вариант разбора (например, способ чтения),
+    поэтому изменённый файл или файл, разобранный другим способом, разбирается заново.
+    В памяти - LRU с ограничением по объёму; дополнительно (по настройке) словари
+    сохраняются на диск в pickle-файлы и переживают перезапуск приложения.
+    Возвращаемые словари общие для всех вызовов - изменять их нельзя (нужно копировать).
+    """
+    def __init__(self, max_memory_mb=64, disk_folder=None, log_callback=None):
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.disk_folder = disk_folder
+        self.log_message = log_callback if log_callback else print
+        self._entries = OrderedDict() # {путь: (ключ файла, данные, размер в байтах)}
+        self._memory_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _file_key(file_path, variant=None):
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, variant)
+
+    @staticmethod
+    def _estimate_size(data):
+        """Приблизительный объём словаря в памяти (строки ключей и значений)."""
+        return sys.getsizeof(data) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in data.items())
+
+    def get(self, file_path, loader, variant=None):
+        """
+        Возвращает разобранные данные файла: из памяти, с диска или вызовом loader(file_path).
+        `variant` - строка, отличающая разные способы разбора одного файла (входит в ключ).
+        Исключения loader пробрасываются вызывающему.
+        """
+        file_key = self._file_key(file_path, variant)
+        path = file_key[0]
+
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == file_key:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+        data = self._load_from_disk(file_key)
+        if data is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            data = loader(file_path)
+            self._save_to_disk(file_key, data)
+
+        self._remember(path, file_key, data)
+        return data
+
+    def _remember(self, path, file_key, data):
+        old_entry = self._entries.pop(path, None)
+        if old_entry is not None:
+            self._memory_bytes -= old_entry[2]
+
+        size = self._estimate_size(data)
+        if size > self.max_memory_bytes:
+            return # Слишком большой файл не вытесняет весь кэш
+        self._entries[path] = (file_key, data, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def clear(self):
+        """Очищает кэш в памяти (файлы на диске не удаляются)."""
+        self._entries.clear()
+        self._memory_bytes = 0
+
+    # --- Кэш на диске ---
+    def _disk_path(self, path):
+        name = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_folder, f"{name}.pkl")
+
+    def _load_from_disk(self, file_key):
+        if not self.disk_folder:
+            return None
+        disk_path = self._disk_path(file_key[0])
+        try:
+            with open(disk_path, 'rb') as f:
+                stored_key, data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.log_message(f"Повреждён кэш файла данных {disk_path}: {e}. Файл будет разобран заново.", level="warning")
+            return None
+        # Сравниваем как кортежи: ключ файла мог быть сохранён другим процессом
+        return data if tuple(stored_key) == file_key else None
+
+    def _save_to_disk(self, file_key, data):
+        if not self.disk_folder:
+            return
+        try:
+            os.makedirs(self.disk_folder, exist_ok=True)
+            disk_path = self._disk_path(file_key[0])
+            tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((file_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, disk_path)
+        except OSError as e:
+            self.log_message(f"Не удалось сохранить кэш файла данных на диск: {e}", level="warning")
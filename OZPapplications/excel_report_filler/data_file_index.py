@@ -0,0 +1,126 @@
+import json
+import os
+
+
+class DataFileIndex:
+    """
+    Индекс файлов данных ("Объемы выполненных работ ...") в папке с данными.
+    Строится одним обходом папки и позволяет за O(1) найти файл данных по адресу.
+
+    Адрес файла извлекается из его имени (тем же регулярным выражением, что и для отчётов),
+    а если в имени адреса нет - из имён вложенных папок. Для адресов, у которых нет собственного файла,
+    возвращается общий файл: первый файл без адреса, а если таких нет - первый найденный файл
+    (как при поиске обходом папки до появления индекса).
+    Индекс остаётся актуальным, пока не изменились mtime папок (добавление, удаление
+    и переименование файлов меняют mtime содержащей их папки).
+    """
+    TARGET_SUBSTRING = "Объемы выполненных работ по подготовке объекта к эксплуатации"
+    DATA_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+    FORMAT_VERSION = 2 # Меняется при изменении правил построения: сохранённый индекс другой версии строится заново
+
+    def __init__(self, data_folder, address_pattern=''):
+        self.data_folder = os.path.abspath(data_folder)
+        self.address_pattern = address_pattern
+        self.by_address = {} # {адрес: путь к файлу данных}
+        self.shared_file = None # Общий файл для адресов без собственного файла
+        self.dir_mtimes = {} # {папка: mtime_ns} для проверки актуальности
+
+    @classmethod
+    def build(cls, data_folder, utils, address_pattern=''):
+        """Строит индекс одним обходом `data_folder`."""
+        index = cls(data_folder, address_pattern)
+        target = cls.TARGET_SUBSTRING.lower()
+        unaddressed_files = []
+        first_file = None
+        for root, dirs, files in os.walk(index.data_folder):
+            try:
+                index.dir_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            for f in files:
+                f_lower = f.lower()
+                if not (f_lower.endswith(cls.DATA_EXTENSIONS) and target in f_lower):
+                    continue
+                path = os.path.join(root, f)
+                if first_file is None:
+                    first_file = path
+                address = utils.extract_address_from_filename(f) or index._address_from_dirs(root, utils)
+                if address:
+                    # Как и раньше, при нескольких подходящих файлах берётся первый найденный
+                    index.by_address.setdefault(address, path)
+                else:
+                    unaddressed_files.append(path)
+
+        # Без файлов без адреса - первый найденный файл, как при прежнем обходе папки
+        index.shared_file = unaddressed_files[0] if unaddressed_files else first_file
+        return index
+
+    def _address_from_dirs(self, root, utils):
+        """Ищет адрес в именах вложенных папок, начиная с ближайшей к файлу."""
+        relative = os.path.relpath(root, self.data_folder)
+        if relative == os.curdir:
+            return None
+        for part in reversed(relative.split(os.sep)):
+            address = utils.extract_address_from_filename(part)
+            if address:
+                return address
+        return None
+
+    def find(self, address):
+        """Возвращает путь к файлу данных для адреса (или общий файл), либо None."""
+        return self.by_address.get(address, self.shared_file)
+
+    def is_current(self):
+        """Проверяет, что ни одна из проиндексированных папок не изменилась."""
+        for folder, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(folder).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    # --- Сохранение индекса между запусками ---
+    def to_dict(self):
+        return {
+            "version": self.FORMAT_VERSION,
+            "address_pattern": self.address_pattern,
+            "by_address": self.by_address,
+            "shared_file": self.shared_file,
+            "dir_mtimes": self.dir_mtimes,
+        }
+
+    @classmethod
+    def load(cls, cache_file, data_folder, address_pattern=''):
+        """
+        Загружает сохранённый индекс папки из `cache_file`.
+        Возвращает None, если индекса нет или он построен с другим шаблоном адреса (или другой версией).
+        """
+        data_folder = os.path.abspath(data_folder)
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(data_folder)
+        except (OSError, ValueError, AttributeError):
+            return None
+        if not entry or entry.get("version") != cls.FORMAT_VERSION or entry.get("address_pattern") != address_pattern:
+            return None
+        index = cls(data_folder, address_pattern)
+        index.by_address = entry.get("by_address", {})
+        index.shared_file = entry.get("shared_file")
+        index.dir_mtimes = entry.get("dir_mtimes", {})
+        return index
+
+    def save(self, cache_file):
+        """Сохраняет индекс в `cache_file` (файл может хранить индексы нескольких папок)."""
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if not isinstance(entries, dict):
+                entries = {}
+        except (OSError, ValueError):
+            entries = {}
+        entries[self.data_folder] = self.to_dict()
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
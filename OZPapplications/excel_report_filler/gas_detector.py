@@ -0,0 +1,55 @@
+import re
+
+from openpyxl.utils import get_column_letter
+
+
+class GasDetector:
+    """
+    Определяет наличие газоснабжения в отчёте.
+    Все ключевые слова ([Regex] gas_detection_keywords) собраны в одно регулярное выражение,
+    поэтому лист просматривается один раз: каждый уникальный текст индекса меток
+    проверяется одним поиском. Для каждой найденной метки проверяется ячейка со смещением
+    (gas_detection_cell_offset_x/y): значение "Да"/"Есть"/... означает наличие газа.
+    """
+    def __init__(self, keywords, offset_x, offset_y, utils):
+        self.keywords = [k.lower() for k in keywords if k]
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.utils = utils
+        # Длинные слова раньше коротких: в найденной метке указывается наиболее точное слово
+        alternatives = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(k) for k in alternatives)) if alternatives else None
+
+    def find_keyword_cells(self, label_index):
+        """Возвращает [(row, col, ключевое слово)] всех меток с ключевыми словами в порядке обхода листа."""
+        if self.pattern is None:
+            return []
+        hits = []
+        for text, coords in label_index.labels.items():
+            match = self.pattern.search(text)
+            if match:
+                hits.extend((row, col, match.group(0)) for row, col in coords)
+        hits.sort()
+        return hits
+
+    def detect(self, label_index, worksheet=None):
+        """
+        Возвращает (есть газ, основание). Основание - строка вида
+        "'газоснабжение' в F25, значение в F26: 'да'" для решившей ячейки, или None.
+        Если лист загружен полностью (`worksheet`), значение читается из него, иначе - из индекса меток;
+        в обоих случаях ячейка внутри объединения даёт значение его верхней левой ячейки.
+        """
+        for row, col, keyword in self.find_keyword_cells(label_index):
+            target_row = row + self.offset_y
+            target_col = col + self.offset_x
+            if target_row < 1 or target_col < 1:
+                continue
+            if worksheet is not None:
+                value = self.utils.get_cell_value(worksheet, target_row, target_col)
+            else:
+                value = label_index.value_at(target_row, target_col)
+            if self.utils.get_boolean_from_text(value):
+                evidence = (f"'{keyword}' в {get_column_letter(col)}{row}, "
+                            f"значение в {get_column_letter(target_col)}{target_row}: '{value}'")
+                return True, evidence
+        return False, None
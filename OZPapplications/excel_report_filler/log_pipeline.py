@@ -0,0 +1,88 @@
+import datetime
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class LogQueue:
+    """
+    Потокобезопасная очередь сообщений журнала между фоновыми задачами и интерфейсом.
+    Фоновый код (ReportProcessor, CommissionManager) вызывает put() - без блокировок
+    и без обращения к виджетам. Интерфейс периодически (по таймеру Tk) забирает
+    сообщения пачками через drain():
+    - за один вызов забирается не больше `batch_size` сообщений (ограничение скорости вывода);
+    - одинаковые предупреждения в пачке и подряд идущие одинаковые сообщения
+      схлопываются в одно со счётчиком повторов.
+    Если подключён файл журнала (attach_file), каждое сообщение без схлопывания
+    дописывается в файл с ротацией по размеру.
+    """
+    COALESCED_LEVELS = ("warning", "debug")
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._file_logger = None
+
+    def attach_file(self, path, max_bytes=5 * 1024 * 1024, backup_count=3):
+        """Подключает файл журнала с ротацией: при превышении max_bytes файл переименовывается в .1, .2 и т.д."""
+        self.close_file()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger(f"{__name__}.{id(self)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._file_logger = logger
+
+    def close_file(self):
+        """Отключает и закрывает файл журнала."""
+        if self._file_logger is None:
+            return
+        for handler in list(self._file_logger.handlers):
+            self._file_logger.removeHandler(handler)
+            handler.close()
+        self._file_logger = None
+
+    def put(self, message, level="info"):
+        """Ставит сообщение в очередь (можно вызывать из любого потока)."""
+        self._queue.put((datetime.datetime.now(), level, str(message)))
+
+    def pending(self):
+        """Приблизительное число сообщений в очереди."""
+        return self._queue.qsize()
+
+    def drain(self):
+        """Забирает пачку сообщений. Возвращает список (время, уровень, сообщение, число повторов)."""
+        entries = []
+        try:
+            while len(entries) < self.batch_size:
+                entries.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if self._file_logger is not None:
+            for timestamp, level, message in entries:
+                self._file_logger.info(f"{timestamp:%Y-%m-%d %H:%M:%S} [{level.upper()}] {message}")
+        return self.coalesce(entries)
+
+    @classmethod
+    def coalesce(cls, entries):
+        """Схлопывает повторы: предупреждения - в пределах пачки, остальные уровни - подряд идущие."""
+        coalesced = []
+        positions = {} # {(уровень, сообщение): индекс в coalesced} для схлопываемых уровней
+        for timestamp, level, message in entries:
+            key = (level, message)
+            if level in cls.COALESCED_LEVELS and key in positions:
+                index = positions[key]
+            elif coalesced and coalesced[-1][1:3] == [level, message]:
+                index = len(coalesced) - 1
+            else:
+                if level in cls.COALESCED_LEVELS:
+                    positions[key] = len(coalesced)
+                coalesced.append([timestamp, level, message, 1])
+                continue
+            coalesced[index][3] += 1
+        return [tuple(entry) for entry in coalesced]
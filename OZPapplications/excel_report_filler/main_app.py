@@ -1,14 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import datetime
 import os
 import threading # Для выполнения долгих операций в фоновом режиме
+import multiprocessing # Для параллельной обработки отчётов (см. ReportProcessor)
 
 # Импорт наших модулей
 from config_manager import ConfigManager
 from commission_manager import CommissionManager
 from report_processor import ReportProcessor
 from utils import Utils # Импортируем класс Utils
+from log_pipeline import LogQueue
+from virtual_treeview import VirtualTreeview
+
+LOG_POLL_INTERVAL_MS = 100 # Период вывода накопленных сообщений журнала в окно
+LOG_LEVELS = ["info", "success", "warning", "error", "debug"]
+SEARCH_DELAY_MS = 150 # Пауза после ввода в поле поиска перед фильтрацией
+TREE_CHUNK_SIZE = 500 # Сколько строк таблицы заполнять за один проход цикла событий Tk
 
 class ReportFillerApp(tk.Tk):
     def __init__(self):
@@ -17,20 +24,82 @@ class ReportFillerApp(tk.Tk):
         self.geometry("1000x700")
         self.minsize(800, 600)
 
+        # Очередь журнала: фоновые потоки пишут в неё, окно выводит сообщения по таймеру
+        self.log_queue = LogQueue()
+        # Кнопки, которым нужны данные комиссий: недоступны, пока данные загружаются в фоне
+        self.data_controls = []
+        self._chunk_jobs = {} # {таблица: метка текущего заполнения порциями}
+
         self._create_widgets()  # Сначала создаём виджеты!
 
-        # Теперь инициализируем менеджеры
+        # Лёгкие объекты создаём сразу, CommissionManager (разбор Excel) и ReportProcessor - в фоне
         self.config_manager = ConfigManager()
         self.utils = Utils(self.config_manager)
-        self.commission_manager = CommissionManager(self.config_manager, self.log_message)
-        self.report_processor = ReportProcessor(self.config_manager, self.commission_manager, self.utils, self.log_message)
+        self.commission_manager = None
+        self.report_processor = None
 
         self._setup_logging()
+        self._poll_log_queue()
         self._load_initial_settings()
-        self._populate_commission_trees()
 
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
         self.log_message("Приложение запущено.", level="info")
+        self._start_background_loading()
+
+    def _data_control(self, widget):
+        """Запоминает элемент управления (кнопку, поле поиска), который станет доступен после загрузки данных комиссий."""
+        widget.state(["disabled"])
+        self.data_controls.append(widget)
+        return widget
+
+    def _start_background_loading(self):
+        """Загружает данные комиссий и создаёт обработчик отчётов в фоновом потоке, не задерживая показ окна."""
+        self.log_message("Загрузка данных комиссий...", level="info")
+        threading.Thread(target=self._background_loading_task, daemon=True).start()
+
+    def _background_loading_task(self):
+        try:
+            commission_manager = CommissionManager(self.config_manager, self.log_message)
+            report_processor = ReportProcessor(self.config_manager, commission_manager, self.utils, self.log_message)
+        except Exception as e:
+            self.log_message(f"Ошибка при загрузке данных комиссий: {e}", level="error")
+            return
+        try:
+            self.after(0, self._on_background_loading_done, commission_manager, report_processor)
+        except (RuntimeError, tk.TclError):
+            pass # Окно закрыли до окончания загрузки
+
+    def _on_background_loading_done(self, commission_manager, report_processor):
+        """Принимает загруженные данные (в главном потоке), заполняет таблицы порциями и включает кнопки."""
+        self.commission_manager = commission_manager
+        self.report_processor = report_processor
+        self._populate_commission_trees(on_done=self._enable_data_controls)
+
+    def _enable_data_controls(self):
+        for widget in self.data_controls:
+            widget.state(["!disabled"])
+        self.log_message("Данные комиссий загружены.", level="success")
+
+    def _run_in_chunks(self, key, items, handle_chunk, on_done=None):
+        """
+        Обрабатывает items порциями по TREE_CHUNK_SIZE между событиями Tk, чтобы окно не замирало.
+        Новый вызов с тем же key отменяет незаконченный предыдущий.
+        """
+        items = list(items)
+        token = object()
+        self._chunk_jobs[key] = token
+
+        def step(start):
+            if self._chunk_jobs.get(key) is not token:
+                return
+            handle_chunk(items[start:start + TREE_CHUNK_SIZE])
+            if start + TREE_CHUNK_SIZE < len(items):
+                self.after(1, step, start + TREE_CHUNK_SIZE)
+            else:
+                self._chunk_jobs.pop(key, None)
+                if on_done:
+                    on_done()
+        step(0)
 
     def _create_widgets(self):
         """Создает основные виджеты пользовательского интерфейса."""
@@ -57,6 +126,14 @@ class ReportFillerApp(tk.Tk):
         self.save_log_button = ttk.Button(self.log_frame, text="Сохранить журнал", command=self._save_log_to_file)
         self.save_log_button.pack(side="right", padx=5, pady=2)
 
+        # Фильтр по уровням: скрытые уровни прячутся через тег (elide), без перерисовки журнала
+        self.log_level_vars = {}
+        for level in LOG_LEVELS:
+            var = tk.BooleanVar(value=True)
+            self.log_level_vars[level] = var
+            ttk.Checkbutton(self.log_frame, text=level.upper(), variable=var,
+                            command=lambda lvl=level: self._toggle_log_level(lvl)).pack(side="left", padx=2, pady=2)
+
         self.status_bar = ttk.Label(self, text="Готов", relief=tk.SUNKEN, anchor="w")
         self.status_bar.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
 
@@ -85,13 +162,13 @@ class ReportFillerApp(tk.Tk):
         report_actions_frame = ttk.LabelFrame(self.report_filling_frame, text="Действия с отчётами")
         report_actions_frame.pack(fill="x", padx=10, pady=5)
 
-        ttk.Button(report_actions_frame, text="Сканировать отчёты", command=self._scan_reports).pack(side="left", padx=5, pady=5)
+        self._data_control(ttk.Button(report_actions_frame, text="Сканировать отчёты", command=self._scan_reports)).pack(side="left", padx=5, pady=5)
         self.report_selection_combobox = ttk.Combobox(report_actions_frame, state="readonly", width=50)
         self.report_selection_combobox.pack(side="left", padx=5, pady=5, expand=True, fill="x")
         self.report_selection_combobox.set("Выберите отчёт")
 
-        ttk.Button(report_actions_frame, text="Заполнить выбранный", command=self._start_fill_selected_report_thread).pack(side="left", padx=5, pady=5)
-        ttk.Button(report_actions_frame, text="Заполнить ВСЕ", command=self._start_fill_all_reports_thread).pack(side="left", padx=5, pady=5)
+        self._data_control(ttk.Button(report_actions_frame, text="Заполнить выбранный", command=self._start_fill_selected_report_thread)).pack(side="left", padx=5, pady=5)
+        self._data_control(ttk.Button(report_actions_frame, text="Заполнить ВСЕ", command=self._start_fill_all_reports_thread)).pack(side="left", padx=5, pady=5)
 
         self.progress_label = ttk.Label(self.report_filling_frame, text="Прогресс: Ожидание...")
         self.progress_label.pack(pady=5)
@@ -107,13 +184,13 @@ class ReportFillerApp(tk.Tk):
         self.commission_types_file_entry = ttk.Entry(commission_file_frame, width=60)
         self.commission_types_file_entry.grid(row=0, column=1, padx=5, pady=2, sticky="ew")
         ttk.Button(commission_file_frame, text="Выбрать", command=self._select_commission_types_file).grid(row=0, column=2, padx=5, pady=2)
-        ttk.Button(commission_file_frame, text="Загрузить", command=self._load_commission_types).grid(row=0, column=3, padx=5, pady=2)
+        self._data_control(ttk.Button(commission_file_frame, text="Загрузить", command=self._load_commission_types)).grid(row=0, column=3, padx=5, pady=2)
 
         ttk.Label(commission_file_frame, text="Файл сопоставления Адрес-Район-Газ:").grid(row=1, column=0, padx=5, pady=2, sticky="w")
         self.address_map_file_entry = ttk.Entry(commission_file_frame, width=60)
         self.address_map_file_entry.grid(row=1, column=1, padx=5, pady=2, sticky="ew")
         ttk.Button(commission_file_frame, text="Выбрать", command=self._select_address_map_file).grid(row=1, column=2, padx=5, pady=2)
-        ttk.Button(commission_file_frame, text="Загрузить", command=self._load_address_map).grid(row=1, column=3, padx=5, pady=2)
+        self._data_control(ttk.Button(commission_file_frame, text="Загрузить", command=self._load_address_map)).grid(row=1, column=3, padx=5, pady=2)
 
         commission_file_frame.grid_columnconfigure(1, weight=1)
 
@@ -145,31 +222,42 @@ class ReportFillerApp(tk.Tk):
 
         types_buttons_frame = ttk.Frame(commission_types_view_frame)
         types_buttons_frame.pack(fill="x", pady=5)
-        ttk.Button(types_buttons_frame, text="Добавить тип", command=self._add_commission_type).pack(side="left", padx=5)
-        ttk.Button(types_buttons_frame, text="Редактировать тип", command=self._edit_commission_type).pack(side="left", padx=5)
-        ttk.Button(types_buttons_frame, text="Удалить тип", command=self._delete_commission_type).pack(side="left", padx=5)
-        ttk.Button(types_buttons_frame, text="Экспорт типов", command=self._export_commission_types).pack(side="right", padx=5)
+        self._data_control(ttk.Button(types_buttons_frame, text="Добавить тип", command=self._add_commission_type)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(types_buttons_frame, text="Редактировать тип", command=self._edit_commission_type)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(types_buttons_frame, text="Удалить тип", command=self._delete_commission_type)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(types_buttons_frame, text="Экспорт типов", command=self._export_commission_types)).pack(side="right", padx=5)
 
 
         address_map_view_frame = ttk.LabelFrame(self.commission_management_frame, text="Сопоставление Адрес-Район-Газ")
         address_map_view_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-        # Treeview для отображения сопоставления адресов
-        self.address_map_tree = ttk.Treeview(address_map_view_frame, columns=("Адрес", "Район", "Газ"), show="headings")
+        search_frame = ttk.Frame(address_map_view_frame)
+        search_frame.pack(fill="x", pady=(0, 5))
+        ttk.Label(search_frame, text="Поиск (адрес или район):").pack(side="left", padx=5)
+        self.address_search_var = tk.StringVar()
+        self._data_control(ttk.Entry(search_frame, textvariable=self.address_search_var, width=40)).pack(side="left", fill="x", expand=True, padx=5)
+        self.address_search_count_label = ttk.Label(search_frame, text="")
+        self.address_search_count_label.pack(side="left", padx=5)
+        self._address_search_job = None
+        self.address_search_var.trace_add("write", lambda *args: self._schedule_address_search())
+
+        # Treeview для отображения сопоставления адресов: создаются элементы только для видимых строк
+        self.address_map_view = VirtualTreeview(address_map_view_frame, columns=("Адрес", "Район", "Газ"))
+        self.address_map_tree = self.address_map_view.tree
         self.address_map_tree.heading("Адрес", text="Адрес")
         self.address_map_tree.heading("Район", text="Район")
         self.address_map_tree.heading("Газ", text="Газ")
         self.address_map_tree.column("Адрес", width=250, stretch=tk.YES)
         self.address_map_tree.column("Район", width=100, stretch=tk.NO)
         self.address_map_tree.column("Газ", width=50, stretch=tk.NO)
-        self.address_map_tree.pack(fill="both", expand=True)
+        self.address_map_view.frame.pack(fill="both", expand=True)
 
         map_buttons_frame = ttk.Frame(address_map_view_frame)
         map_buttons_frame.pack(fill="x", pady=5)
-        ttk.Button(map_buttons_frame, text="Добавить сопоставление", command=self._add_address_map).pack(side="left", padx=5)
-        ttk.Button(map_buttons_frame, text="Редактировать сопоставление", command=self._edit_address_map).pack(side="left", padx=5)
-        ttk.Button(map_buttons_frame, text="Удалить сопоставление", command=self._delete_address_map).pack(side="left", padx=5)
-        ttk.Button(map_buttons_frame, text="Экспорт сопоставлений", command=self._export_address_map).pack(side="right", padx=5)
+        self._data_control(ttk.Button(map_buttons_frame, text="Добавить сопоставление", command=self._add_address_map)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(map_buttons_frame, text="Редактировать сопоставление", command=self._edit_address_map)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(map_buttons_frame, text="Удалить сопоставление", command=self._delete_address_map)).pack(side="left", padx=5)
+        self._data_control(ttk.Button(map_buttons_frame, text="Экспорт сопоставлений", command=self._export_address_map)).pack(side="right", padx=5)
 
         def open_field_mapping_window(self, report_fields, data_fields):
             """
@@ -204,33 +292,75 @@ class ReportFillerApp(tk.Tk):
 
 
     def _setup_logging(self):
-        """Настраивает стили для логов."""
+        """Настраивает стили для логов, размер журнала в окне и файл журнала с ротацией."""
         self.log_text.tag_configure("info", foreground="black")
         self.log_text.tag_configure("warning", foreground="orange")
         self.log_text.tag_configure("error", foreground="red")
         self.log_text.tag_configure("success", foreground="green")
         self.log_text.tag_configure("debug", foreground="gray") # Добавим для отладочных сообщений
 
+        self.log_view_max_lines = max(self.config_manager.get_int('Logging', 'view_max_lines', 2000), 1)
+        log_file = self.config_manager.get('Logging', 'file', 'logs/report_filler.log')
+        if log_file and not os.path.isabs(log_file):
+            log_file = self.config_manager.get_cache_path(log_file) # Рядом с config.ini, как и остальные служебные файлы
+        if log_file:
+            try:
+                self.log_queue.attach_file(
+                    log_file,
+                    max_bytes=self.config_manager.get_int('Logging', 'file_max_mb', 5) * 1024 * 1024,
+                    backup_count=self.config_manager.get_int('Logging', 'file_backups', 3)
+                )
+            except OSError as e:
+                self.log_message(f"Не удалось открыть файл журнала {log_file}: {e}", level="warning")
+
+    def _toggle_log_level(self, level):
+        """Показывает или скрывает в окне сообщения уровня `level`."""
+        self.log_text.tag_configure(level, elide=not self.log_level_vars[level].get())
+
     def log_message(self, message, level="info"):
         """
-        Добавляет сообщение в текстовое поле логов с меткой времени и цветом.
+        Ставит сообщение в очередь журнала. Можно вызывать из любого потока:
+        виджеты обновляются только в главном потоке (_poll_log_queue).
         """
-        timestamp = datetime.datetime.now().strftime("[%H:%M:%S]")
+        self.log_queue.put(message, level)
+
+    def _poll_log_queue(self):
+        """Периодически выводит накопленные сообщения журнала (в главном потоке Tk)."""
+        self._drain_log_queue()
+        # Если очередь не успели разобрать за один раз, следующую пачку выводим без паузы
+        delay = 1 if self.log_queue.pending() else LOG_POLL_INTERVAL_MS
+        self.after(delay, self._poll_log_queue)
+
+    def _drain_log_queue(self):
+        """Выводит одну пачку сообщений из очереди: одна вставка в текстовое поле и одно обновление строки статуса."""
+        entries = self.log_queue.drain()
+        if not entries:
+            return
+        chunks = []
+        for timestamp, level, message, repeats in entries:
+            suffix = f" (повторено {repeats} раз)" if repeats > 1 else ""
+            chunks.extend((f"{timestamp:[%H:%M:%S]} [{level.upper()}] {message}{suffix}\n", level))
         self.log_text.config(state="normal")
-        self.log_text.insert(tk.END, f"{timestamp} [{level.upper()}] {message}\n", level)
+        self.log_text.insert(tk.END, *chunks)
+        # В окне остаются только последние log_view_max_lines строк (полный журнал - в файле)
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - self.log_view_max_lines
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see(tk.END)
         self.log_text.config(state="disabled")
 
-        self.status_bar.config(text=f"Статус: {message}")
+        self.status_bar.config(text=f"Статус: {entries[-1][2]}")
 
     def _save_log_to_file(self):
-        """Сохраняет содержимое журнала в текстовый файл."""
+        """Сохраняет в текстовый файл строки журнала, показанные в окне (полный журнал ведётся в файле [Logging] file)."""
         file_path = filedialog.asksaveasfilename(
             defaultextension=".log",
             filetypes=[("Log files", "*.log"), ("Text files", "*.txt"), ("All files", "*.*")],
             title="Сохранить журнал как"
         )
         if file_path:
+            while self.log_queue.pending(): # Сначала выводим всё, что ещё в очереди
+                self._drain_log_queue()
             try:
                 with open(file_path, "w", encoding="utf-8") as f:
                     f.write(self.log_text.get("1.0", tk.END))
@@ -250,10 +380,8 @@ class ReportFillerApp(tk.Tk):
             self.commission_types_file_entry.insert(0, self.config_manager.get('Paths', 'commission_types_file'))
             self.address_map_file_entry.insert(0, self.config_manager.get('Paths', 'address_map_file'))
             self.log_message("Настройки загружены.", level="info")
-
-            # Попытаемся загрузить данные комиссий сразу после загрузки путей
-            self._load_commission_types(initial_load=True)
-            self._load_address_map(initial_load=True)
+            # Данные комиссий по этим путям CommissionManager загружает в фоновом потоке,
+            # таблицы заполняются частями после загрузки (_on_background_loading_done)
 
         except Exception as e:
             self.log_message(f"Ошибка при загрузке настроек или начальных данных: {e}", level="error")
@@ -271,6 +399,9 @@ class ReportFillerApp(tk.Tk):
             self.log_message("Настройки сохранены.", level="info")
         except Exception as e:
             self.log_message(f"Ошибка при сохранении настроек: {e}", level="error")
+        while self.log_queue.pending(): # Дописываем в файл журнала всё, что осталось в очереди
+            self._drain_log_queue()
+        self.log_queue.close_file()
         self.destroy()
 
     # --- Методы для выбора папок ---
@@ -348,10 +479,10 @@ class ReportFillerApp(tk.Tk):
         else:
             self.log_message("Ошибка при загрузке сопоставления адресов.", level="error")
 
-    def _populate_commission_trees(self):
-        """Обновляет Treeview с данными о комиссиях и сопоставлениях."""
+    def _populate_commission_trees(self, on_done=None):
+        """Обновляет Treeview с данными о комиссиях и сопоставлениях (порциями, on_done - после заполнения)."""
         self._populate_commission_types_tree()
-        self._populate_address_map_tree()
+        self._populate_address_map_tree(on_done=on_done)
 
     def _populate_commission_types_tree(self):
         """Заполняет Treeview с типами комиссий."""
@@ -377,19 +508,46 @@ class ReportFillerApp(tk.Tk):
         # Для полноценной динамики нужно пересоздавать Treeview или использовать более продвинутые методы.
         # Предполагаем, что наши основные колонки (Район, Газ, Председатель, Член 1, Ресурсник) уже заданы.
         
-        for row_data in data_to_display:
-            values = [row_data.get(col, "") for col in self.commission_types_tree["columns"]]
-            self.commission_types_tree.insert("", tk.END, values=values)
+        columns = self.commission_types_tree["columns"]
 
+        def insert_rows(chunk):
+            for row_data in chunk:
+                values = [row_data.get(col, "") for col in columns]
+                self.commission_types_tree.insert("", tk.END, values=values)
+        self._run_in_chunks("commission_types", data_to_display, insert_rows)
 
-    def _populate_address_map_tree(self):
-        """Заполняет Treeview с сопоставлением адресов."""
-        for item in self.address_map_tree.get_children():
-            self.address_map_tree.delete(item)
 
+    def _populate_address_map_tree(self, on_done=None):
+        """Заполняет Treeview с сопоставлением адресов (после загрузки файла) порциями."""
         data_to_display = self.commission_manager.get_all_address_maps_for_display()
-        for row_data in data_to_display:
-            self.address_map_tree.insert("", tk.END, values=(row_data["Адрес"], row_data["Район"], row_data["Газ"]))
+        self.address_map_view.set_rows([])
+
+        def add_rows(chunk):
+            self.address_map_view.extend_rows(
+                (row_data["Адрес"], (row_data["Адрес"], row_data["Район"], row_data["Газ"])) for row_data in chunk
+            )
+            self._update_address_search_count()
+        self._run_in_chunks("address_map", data_to_display, add_rows, on_done=on_done)
+
+    def _schedule_address_search(self):
+        """Фильтрует сопоставления адресов после короткой паузы в наборе текста."""
+        if self._address_search_job is not None:
+            self.after_cancel(self._address_search_job)
+        self._address_search_job = self.after(SEARCH_DELAY_MS, self._apply_address_search)
+
+    def _apply_address_search(self):
+        self._address_search_job = None
+        if self.commission_manager is None:
+            return # Данные ещё загружаются (поле поиска в это время отключено)
+        self.address_map_view.filter(self.address_search_var.get())
+        self._update_address_search_count()
+
+    def _update_address_search_count(self):
+        if self.commission_manager is None:
+            return
+        total = len(self.commission_manager.address_to_commission_map)
+        shown = self.address_map_view.visible_count()
+        self.address_search_count_label.config(text=f"{shown} из {total}" if shown != total else f"{total}")
 
     # --- Методы для работы с отчетами ---
     def _scan_reports(self):
@@ -671,7 +829,8 @@ class ReportFillerApp(tk.Tk):
                 messagebox.showwarning("Ошибка", "Укажите адрес и район.")
                 return
             self.commission_manager.add_address_map(address, region, has_gas)
-            self._populate_address_map_tree()
+            self.address_map_view.upsert(address, (address, region, "Да" if has_gas else "Нет"))
+            self._update_address_search_count()
             win.destroy()
             self.log_message(f"Добавлено сопоставление: {address} → {region} (Газ: {'Да' if has_gas else 'Нет'})", "success")
     
@@ -690,34 +849,29 @@ class ReportFillerApp(tk.Tk):
         tk.Button(win, text="Сохранить", command=save).grid(row=3, column=0, columnspan=2, pady=10)
 
     def _edit_address_map(self):
-        selected_item = self.address_map_tree.focus()
-        if not selected_item:
+        values = self.address_map_view.focused_values()
+        if not values:
             messagebox.showwarning("Предупреждение", "Выберите сопоставление адреса для редактирования.")
             return
 
-        values = self.address_map_tree.item(selected_item, 'values')
         address = values[0]
         self.log_message("Редактирование выбранного сопоставления адреса (не реализовано в UI).", level="info")
         messagebox.showinfo("Информация", f"Редактирование сопоставления адреса '{address}' будет реализовано позже.")
         # Пример использования:
         # self.commission_manager.add_address_map(address, "Обновленный Район", True) # add_address_map также обновляет
-        # self._populate_address_map_tree()
+        # self.address_map_view.upsert(address, (address, "Обновленный Район", "Да"))
 
     def _delete_address_map(self):
-        selected_items = self.address_map_tree.selection()
-        if not selected_items:
+        selected_addresses = self.address_map_view.selected_keys()
+        if not selected_addresses:
             messagebox.showwarning("Предупреждение", "Выберите одно или несколько сопоставлений адресов для удаления.")
             return
         
-        if messagebox.askyesno("Подтверждение удаления", f"Вы уверены, что хотите удалить {len(selected_items)} выбранных сопоставлений адресов?"):
-            deleted_count = 0
-            for item_id in selected_items:
-                values = self.address_map_tree.item(item_id, 'values')
-                address = values[0]
-                if self.commission_manager.delete_address_map(address):
-                    deleted_count += 1
-            self.log_message(f"Удалено {deleted_count} сопоставлений адресов.", level="success")
-            self._populate_address_map_tree() # Обновляем Treeview
+        if messagebox.askyesno("Подтверждение удаления", f"Вы уверены, что хотите удалить {len(selected_addresses)} выбранных сопоставлений адресов?"):
+            deleted = [address for address in selected_addresses if self.commission_manager.delete_address_map(address)]
+            self.log_message(f"Удалено {len(deleted)} сопоставлений адресов.", level="success")
+            self.address_map_view.remove(deleted) # Убираем только удалённые строки
+            self._update_address_search_count()
 
     def _export_address_map(self):
         file_path = filedialog.asksaveasfilename(
@@ -730,5 +884,6 @@ class ReportFillerApp(tk.Tk):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Нужно для пула процессов в собранном .exe
     app = ReportFillerApp()
     app.mainloop()
\ No newline at end of file
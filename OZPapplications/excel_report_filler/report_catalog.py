@@ -0,0 +1,123 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+
+
+class ReportCatalog:
+    """
+    Каталог обработанных отчётов в локальной базе SQLite (одна строка на файл отчёта).
+    Хранит размер, mtime и хэш содержимого отчёта, извлечённый адрес, отпечаток шаблона,
+    наличие газа, последний статус, путь к заполненному файлу и ключ входных данных
+    (файл данных, состав комиссии, настройки - см. ReportProcessor._report_inputs_key).
+
+    В инкрементальном режиме отчёт не обрабатывается заново, если не изменились ни он сам,
+    ни его входные данные, а прошлый результат был успешным (и заполненный файл на месте).
+    С базой работает только основной процесс; соединение открывается на один пакет.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            address TEXT,
+            template_fingerprint TEXT,
+            has_gas INTEGER,
+            status TEXT,
+            message TEXT,
+            filled_fields INTEGER,
+            missing_data_fields TEXT,
+            output_path TEXT,
+            inputs_key TEXT,
+            processed_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS reports_address ON reports(address);
+        CREATE INDEX IF NOT EXISTS reports_status ON reports(status);
+    """
+    REUSABLE_STATUSES = ("Успешно", "Пропущен") # Результаты, которые не изменятся при тех же входных данных
+
+    def __init__(self, db_path):
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def file_hash(path):
+        """SHA-1 содержимого файла (читается блоками)."""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, path):
+        return self.connection.execute("SELECT * FROM reports WHERE path = ?", (os.path.abspath(path),)).fetchone()
+
+    def find_unchanged(self, path, inputs_key):
+        """
+        Возвращает прошлый результат отчёта (словарь в формате результата ReportProcessor),
+        если отчёт и его входные данные не изменились; иначе None.
+        Если изменились только размер/mtime, а содержимое то же, сравнивается хэш.
+        """
+        row = self.get(path)
+        if row is None or row["inputs_key"] != inputs_key or row["status"] not in self.REUSABLE_STATUSES:
+            return None
+        if row["status"] == "Успешно" and not (row["output_path"] and os.path.exists(row["output_path"])):
+            return None
+
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (row["size"], row["mtime_ns"]):
+            if self.file_hash(path) != row["content_hash"]:
+                return None
+            # Файл пересохранили без изменений - запоминаем новые размер и mtime, чтобы не хэшировать снова
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE reports SET size = ?, mtime_ns = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime_ns, row["path"])
+                )
+
+        return {
+            "file": os.path.basename(path),
+            "address": row["address"],
+            "status": row["status"],
+            "message": f"Без изменений с {row['processed_at']}: {row['message']}",
+            "filled_fields": row["filled_fields"],
+            "missing_data_fields": json.loads(row["missing_data_fields"] or "[]"),
+            "has_gas": bool(row["has_gas"]),
+            "unchanged": True,
+        }
+
+    def record_many(self, entries):
+        """
+        Записывает результаты пакета одной транзакцией.
+        entries: список (путь к отчёту, ключ входных данных, результат обработки).
+        """
+        processed_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for path, inputs_key, result in entries:
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            rows.append((
+                os.path.abspath(path), stat.st_size, stat.st_mtime_ns, self.file_hash(path),
+                result.get("address"), result.get("template_fingerprint"),
+                int(bool(result.get("has_gas"))), result.get("status"), result.get("message"),
+                result.get("filled_fields", 0), json.dumps(result.get("missing_data_fields", []), ensure_ascii=False),
+                result.get("output_path"), inputs_key, processed_at,
+            ))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO reports (path, size, mtime_ns, content_hash, address, template_fingerprint, "
+                "has_gas, status, message, filled_fields, missing_data_fields, output_path, inputs_key, processed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
@@ -2,10 +2,48 @@ import os
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.utils import get_column_letter, coordinate_to_tuple, range_boundaries
 import re
 import datetime
+import hashlib
+import json
+import cProfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils import SheetLabelIndex, Utils
+from template_cache import TemplateLayoutCache
+from data_file_index import DataFileIndex
+from data_file_cache import DataFileCache
+from xlsx_cell_patcher import XlsxCellPatcher, find_sheet_part, NS_MAIN
+from row_insertion_planner import RowInsertionPlanner
+from gas_detector import GasDetector
+from stage_timer import StageTimer, SlowestProfiles
+from report_catalog import ReportCatalog
+
+# Объединённые ячейки в XML листа (<mergeCell ref="A1:C1"/>) - для предпросмотра в режиме read_only
+MERGE_CELL_TAG = f'{{{NS_MAIN}}}mergeCell'
+
+# Этапы process_single_report (ключи result["timings"]) и их названия в отчёте об обработке
+STAGE_LABELS = {
+    "data_file": "Файл данных",
+    "prescan": "Предпросмотр",
+    "load": "Загрузка книги",
+    "gas_detection": "Определение газа",
+    "field_matching": "Поиск полей",
+    "row_insertion": "Вставка строк",
+    "template_cache": "Кэш шаблонов",
+    "save": "Сохранение",
+    "total": "Всего",
+}
+# Счётчики (ключи result["counters"])
+COUNTER_LABELS = {
+    "cells_indexed": "Ячеек в индексе меток",
+    "cells_scanned": "Ячеек просмотрено поиском по ключевым словам",
+    "fuzzy_calls": "Вызовов нечёткого сравнения",
+    "fuzzy_comparisons": "Нечётких сравнений (пар строк)",
+}
 
 
 class ReportProcessor:
@@ -26,20 +64,53 @@ class ReportProcessor:
         ]
         self.gas_cell_offset_x = int(self.config_manager.get('Regex', 'gas_detection_cell_offset_x'))
         self.gas_cell_offset_y = int(self.config_manager.get('Regex', 'gas_detection_cell_offset_y'))
+        self.gas_detector = GasDetector(self.gas_detection_keywords, self.gas_cell_offset_x, self.gas_cell_offset_y, self.utils)
 
         # Для хранения ручных сопоставлений полей (пока не реализовано в UI)
         try:
             self.manual_field_mappings = self.config_manager.get('FieldMapping', 'manual_mappings')
         except Exception:
             self.manual_field_mappings = {}
-    def _detect_gas_in_report(self, report_path):
+
+        # Предварительный просмотр отчётов в режиме read_only перед полной загрузкой
+        self.prescan_enabled = self.config_manager.get_bool('Processing', 'prescan', True)
+
+        # Быстрое заполнение: значения записываются прямо в XML листа исходного файла
+        self.fast_fill_enabled = self.config_manager.get_bool('Processing', 'fast_fill', False)
+
+        # Профилирование (cProfile) каждого отчёта; сохраняются профили самых медленных
+        self.profiling_enabled = self.config_manager.get_bool('Profiling', 'enabled', False)
+        self.profile_slowest_reports = self.config_manager.get_int('Profiling', 'slowest_reports', 5)
+
+        # Каталог обработанных отчётов (SQLite) и инкрементальный режим: пропуск отчётов без изменений
+        self.report_catalog_enabled = self.config_manager.get_bool('Cache', 'report_catalog', True)
+        self.incremental_enabled = self.config_manager.get_bool('Processing', 'incremental', False)
+
+        # Индекс файлов данных: строится один раз на пакет (см. refresh_data_file_index)
+        self.data_file_index = None
+        # Индекс уже сверен с папкой в текущем пакете: промах по адресу не вызывает повторную проверку
+        self.data_file_index_verified = False
+
+        # Кэш разобранных файлов данных (в памяти и, по настройке, на диске)
+        self.data_file_cache = DataFileCache(
+            max_memory_mb=self.config_manager.get_int('Cache', 'data_cache_memory_mb', 64),
+            disk_folder=(self.config_manager.get_cache_path('data_cache')
+                         if self.config_manager.get_bool('Cache', 'data_cache_on_disk', False) else None),
+            log_callback=self.log_message
+        )
+
+        # Кэш раскладок известных шаблонов (поле -> ячейка), хранится рядом с config.ini
+        self.template_cache = None
+        if self.config_manager.get_bool('Cache', 'template_cache', True):
+            self.template_cache = TemplateLayoutCache(
+                self.config_manager.get_cache_path('template_layouts.json'), self.log_message
+            )
+    def _detect_gas_in_report(self, label_index, worksheet=None):
         """
-        Определяет, есть ли газ в отчёте.
-        Заглушка: всегда возвращает False.
-        Реализуйте свою логику, если нужно.
+        Определяет, есть ли газ в отчёте, по индексу меток листа (см. GasDetector).
+        Возвращает (есть газ, основание решения или None).
         """
-        # TODO: Реализовать определение наличия газа по содержимому отчёта
-        return False
+        return self.gas_detector.detect(label_index, worksheet)
 
     def scan_reports(self, reports_folder):
         """Сканирует указанную папку на наличие файлов отчётов Excel."""
@@ -56,33 +127,219 @@ class ReportProcessor:
         self.log_message(f"Найдено {len(self.report_files)} файлов отчётов в {reports_folder}", level="info")
         return self.report_files
 
-    def process_all_reports(self, reports_folder, data_folder, output_folder, update_progress_callback=None):
-        """Обрабатывает все найденные отчёты."""
+    def process_all_reports(self, reports_folder, data_folder, output_folder, update_progress_callback=None, workers=None, incremental=None):
+        """
+        Обрабатывает все найденные отчёты.
+        `workers` - число процессов для параллельной обработки; по умолчанию
+        берётся из настройки [Processing] workers (0 - по числу ядер, 1 - последовательно).
+        `incremental` - пропускать отчёты, которые не изменились вместе с входными данными
+        с прошлого успешного запуска (по каталогу отчётов); по умолчанию [Processing] incremental.
+        """
         if not self.report_files:
             self.log_message("Нет отчётов для обработки. Сначала просканируйте папку.", level="warning")
             return
 
-        results = []
-        total_reports = len(self.report_files)
-        for i, report_path in enumerate(self.report_files):
-            file_name = os.path.basename(report_path)
-            self.log_message(f"Обработка отчёта {i+1}/{total_reports}: {file_name}", level="info")
-            if update_progress_callback:
-                update_progress_callback(i + 1, total_reports, file_name)
-
-            report_result = self.process_single_report(report_path, data_folder, output_folder)
-            results.append(report_result)
+        self.refresh_data_file_index(data_folder) # Один обход папки с данными на весь пакет
+        self.data_file_index_verified = True
+        if incremental is None:
+            incremental = self.incremental_enabled
+        catalog = None
+        try:
+            catalog = self._open_report_catalog()
+            # Ключи входных данных нужны и для пропуска, и для записи в каталог
+            inputs_keys = {}
+            if catalog:
+                settings = self._processing_settings_snapshot()
+                inputs_keys = {
+                    path: self._report_inputs_key(path, data_folder, output_folder, settings)
+                    for path in self.report_files
+                }
+
+            results_by_path = {}
+            if catalog and incremental:
+                for path in self.report_files:
+                    previous_result = catalog.find_unchanged(path, inputs_keys[path])
+                    if previous_result:
+                        results_by_path[path] = previous_result
+                self.log_message(
+                    f"Инкрементальный режим: без изменений {len(results_by_path)} из {len(self.report_files)} отчётов, "
+                    f"к обработке {len(self.report_files) - len(results_by_path)}.", level="info"
+                )
+            report_files = [path for path in self.report_files if path not in results_by_path]
+
+            processed_results = self._process_report_files(report_files, data_folder, output_folder, update_progress_callback, workers)
+            results_by_path.update(zip(report_files, processed_results))
+            results = [results_by_path[path] for path in self.report_files]
+
+            if catalog and report_files:
+                recorded = catalog.record_many([(path, inputs_keys[path], results_by_path[path]) for path in report_files])
+                self.log_message(f"Каталог отчётов обновлён: {recorded} записей ({catalog.db_path}).", level="info")
+        finally:
+            self.data_file_index_verified = False
+            if catalog:
+                catalog.close()
 
         self._generate_processing_report(output_folder, results)
         self.log_message("Обработка всех отчётов завершена.", level="success")
         return results
 
+    def _process_report_files(self, report_files, data_folder, output_folder, update_progress_callback=None, workers=None):
+        """Обрабатывает список отчётов последовательно или в пуле процессов. Результаты - в порядке report_files."""
+        total_reports = len(report_files)
+        if not total_reports:
+            return []
+        if workers is None:
+            workers = self.config_manager.get_int('Processing', 'workers', 1)
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, total_reports)
+        profiles = SlowestProfiles(self.profile_slowest_reports) if self.profiling_enabled else None
+
+        if workers > 1:
+            results = self._process_reports_parallel(report_files, data_folder, output_folder, workers, update_progress_callback, profiles)
+        else:
+            results = []
+            for i, report_path in enumerate(report_files):
+                file_name = os.path.basename(report_path)
+                self.log_message(f"Обработка отчёта {i+1}/{total_reports}: {file_name}", level="info")
+                if update_progress_callback:
+                    update_progress_callback(i + 1, total_reports, file_name)
+
+                report_result = self.process_single_report(report_path, data_folder, output_folder)
+                if profiles:
+                    profiles.add(report_result)
+                results.append(report_result)
+
+        if profiles:
+            profile_paths = profiles.dump(os.path.join(output_folder, "profiles"))
+            if profile_paths:
+                self.log_message(f"Профили {len(profile_paths)} самых медленных отчётов сохранены в {os.path.dirname(profile_paths[0])}", level="info")
+        return results
+
+    def _open_report_catalog(self):
+        """Открывает каталог отчётов (или None, если он отключён или недоступен)."""
+        if not self.report_catalog_enabled:
+            return None
+        db_path = self.config_manager.get_cache_path('report_catalog.sqlite')
+        try:
+            return ReportCatalog(db_path)
+        except Exception as e:
+            self.log_message(f"Не удалось открыть каталог отчётов {db_path}: {e}. Отчёты будут обработаны без каталога.", level="warning")
+            return None
+
+    def _processing_settings_snapshot(self):
+        """Настройки, влияющие на результат заполнения (число процессов и режим запуска не влияют)."""
+        config = self.config_manager.config
+        settings = {section: dict(config[section]) for section in ('Regex', 'FieldMapping', 'Processing') if section in config}
+        for key in ('workers', 'incremental'):
+            settings.get('Processing', {}).pop(key, None)
+        return settings
+
+    def _report_inputs_key(self, report_path, data_folder, output_folder, settings):
+        """
+        Ключ входных данных отчёта: файл данных (путь, размер, mtime), данные комиссии для адреса,
+        настройки и папка сохранения. Сам файл отчёта сравнивается в каталоге отдельно.
+        """
+        address = self.utils.extract_address_from_filename(os.path.basename(report_path))
+        data_file = None
+        if address:
+            data_file_path = self._find_data_file_for_address(data_folder, address)
+            if data_file_path and os.path.exists(data_file_path):
+                stat = os.stat(data_file_path)
+                data_file = [os.path.abspath(data_file_path), stat.st_size, stat.st_mtime_ns]
+        inputs = {
+            "address": address,
+            "data_file": data_file,
+            "commission": self.commission_manager.commission_fingerprint(address) if address else None,
+            "settings": settings,
+            "output": os.path.abspath(self._output_path(report_path, output_folder)),
+        }
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _output_path(report_path, output_folder):
+        output_file_name = f"{os.path.splitext(os.path.basename(report_path))[0]}_FILLED.xlsx"
+        return os.path.join(output_folder, output_file_name)
+
+    def _process_reports_parallel(self, report_files, data_folder, output_folder, workers, update_progress_callback=None, profiles=None):
+        """
+        Обрабатывает отчёты в пуле из `workers` процессов.
+        Каждый процесс один раз получает настройки и данные комиссий (см. _init_report_worker).
+        Сообщения журнала процессов передаются вместе с результатом и выводятся здесь;
+        результаты возвращаются в порядке report_files.
+        """
+        total_reports = len(report_files)
+        self.log_message(f"Параллельная обработка {total_reports} отчётов в {workers} процессах.", level="info")
+
+        config_snapshot = {section: dict(self.config_manager.config[section]) for section in self.config_manager.config.sections()}
+        initargs = (
+            os.path.abspath(self.config_manager.config_file),
+            config_snapshot,
+            self.commission_manager.commission_types,
+            self.commission_manager.address_to_commission_map,
+            self.data_file_index,
+        )
+
+        results = [None] * total_reports
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_report_worker, initargs=initargs) as executor:
+            futures = {
+                executor.submit(_process_report_in_worker, report_path, data_folder, output_folder): i
+                for i, report_path in enumerate(report_files)
+            }
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                file_name = os.path.basename(report_files[i])
+                try:
+                    report_result, worker_log = future.result()
+                except Exception as e:
+                    self.log_message(f"Критическая ошибка процесса при обработке отчёта '{file_name}': {e}", level="error")
+                    report_result, worker_log = {
+                        "file": file_name,
+                        "address": self.utils.extract_address_from_filename(file_name) or "Неизвестен",
+                        "status": "Ошибка",
+                        "message": f"Критическая ошибка процесса: {e}",
+                        "filled_fields": 0,
+                        "missing_data_fields": []
+                    }, []
+
+                for message, level in worker_log:
+                    self.log_message(message, level=level)
+                if profiles:
+                    profiles.add(report_result)
+                self.log_message(f"Обработан отчёт {done_count}/{total_reports}: {file_name}", level="info")
+                if update_progress_callback:
+                    update_progress_callback(done_count, total_reports, file_name)
+                results[i] = report_result
+        return results
+
     def process_single_report(self, report_path, data_folder, output_folder):
         """
         Обрабатывает один файл отчёта: извлекает данные, заполняет поля,
         вставляет строки и сохраняет.
-        Возвращает словарь с результатом обработки.
+        Возвращает словарь с результатом обработки. В нём же - длительности этапов
+        ("timings", секунды) и счётчики работы ("counters").
         """
+        timer = StageTimer()
+        for name in Utils.COUNTERS:
+            timer.count(name, 0) # Счётчики есть в результате, даже если поиск не понадобился
+        profiler = cProfile.Profile() if self.profiling_enabled else None
+        if profiler:
+            profiler.enable()
+        try:
+            with timer.active():
+                result = self._process_single_report(report_path, data_folder, output_folder, timer)
+        finally:
+            if profiler:
+                profiler.disable()
+
+        result["timings"] = timer.to_dict()
+        result["counters"] = timer.counters
+        if profiler:
+            profiler.create_stats()
+            result["profile_stats"] = profiler.stats # Забирается SlowestProfiles в process_all_reports
+        return result
+
+    def _process_single_report(self, report_path, data_folder, output_folder, timer):
         file_name = os.path.basename(report_path)
         address = self.utils.extract_address_from_filename(file_name)
         if not address:
@@ -109,7 +366,8 @@ class ReportProcessor:
             }
 
         try:
-            data_from_file = self._read_data_file(data_file_path)
+            data_from_file = self.data_file_cache.get(data_file_path, self._read_data_file, variant=self._data_file_reader())
+            timer.lap("data_file")
         except Exception as e:
             self.log_message(f"Ошибка чтения файла данных {data_file_path}: {e}. Пропускаю '{file_name}'.", level="error")
             return {
@@ -125,13 +383,24 @@ class ReportProcessor:
         full_data_for_report = data_from_file.copy()
 
         try:
-            workbook = load_workbook(report_path)
-            sheet = workbook.active # Или выбрать конкретный лист, если нужно
-            self.log_message(f"Открыт отчёт: {file_name}", level="info")
+            # 0. Быстрый предварительный просмотр (read_only) собирает метки листа без полной
+            #    загрузки книги; полная загрузка нужна только отчётам, которые будут заполняться
+            workbook = None
+            if self.prescan_enabled:
+                label_index = self._prescan_report(report_path)
+                timer.lap("prescan")
+            else:
+                workbook = load_workbook(report_path)
+                sheet = workbook.active # Или выбрать конкретный лист, если нужно
+                self.log_message(f"Открыт отчёт: {file_name}", level="info")
+                label_index = SheetLabelIndex(sheet)
+                timer.lap("load")
+            timer.count("cells_indexed", label_index.cell_count)
 
             # 1. Определение наличия газа в отчёте
-            has_gas_in_report = self._detect_gas_in_report(sheet)
-            self.log_message(f"Для '{address}' обнаружено газоснабжение: {'Да' if has_gas_in_report else 'Нет'}", level="info")
+            has_gas_in_report, gas_evidence = self._detect_gas_in_report(label_index, workbook.active if workbook else None)
+            self.log_message(f"Для '{address}' обнаружено газоснабжение: {'Да (' + gas_evidence + ')' if has_gas_in_report else 'Нет'}", level="info")
+            timer.lap("gas_detection")
 
             # 2. Получение состава комиссии
             commission_composition = self.commission_manager.get_commission_composition(address, has_gas_in_report)
@@ -141,17 +410,43 @@ class ReportProcessor:
             else:
                 self.log_message(f"Не удалось найти состав комиссии для '{address}' ({'Газ' if has_gas_in_report else 'Без газа'}).", level="warning")
 
+            # Если есть "Ресурсник" и газ, в отчёт нужно добавить строку (см. ниже)
+            resource_row_required = has_gas_in_report and 'Ресурсник' in full_data_for_report
+
+            # 3. Шаблон из кэша раскладок и оценки полей по меткам листа
+            template_fingerprint, cached_fields = self._prepare_field_matching(label_index, full_data_for_report, file_name)
+            timer.lap("field_matching")
+
+            if workbook is None:
+                if not self._report_needs_writing(label_index, full_data_for_report, cached_fields, resource_row_required):
+                    self.log_message(f"В отчёте '{file_name}' не найдено мест для заполнения данных. Отчёт пропущен без сохранения.", level="warning")
+                    return {
+                        "file": file_name,
+                        "address": address,
+                        "status": "Пропущен",
+                        "message": "В отчёте не найдено полей для заполнения",
+                        "filled_fields": 0,
+                        "missing_data_fields": list(full_data_for_report.keys()),
+                        "has_gas": has_gas_in_report,
+                        "gas_evidence": gas_evidence
+                    }
+                workbook = load_workbook(report_path)
+                sheet = workbook.active # Или выбрать конкретный лист, если нужно
+                self.log_message(f"Открыт отчёт: {file_name}", level="info")
+                timer.lap("load")
 
             filled_count = 0
             missing_fields = []
             matched_cells = {} # Для избежания повторного заполнения одной ячейки
+            written_cells = {} # {(row, col): значение} - план записи для быстрого заполнения
+            rows_inserted = False
 
             # Если есть "Ресурсник" и газа не было, возможно нужно добавить строки
             # Эта логика должна быть более сложной и зависеть от шаблона отчета
             # Для примера, предположим, что ресурсник всегда добавляется последним
             # А также где в отчете искать место для вставки.
             # Пока оставим простой поиск и запись
-            if has_gas_in_report and 'Ресурсник' in full_data_for_report:
+            if resource_row_required:
                 # Находим строку, после которой нужно вставить нового члена комиссии
                 # Например, ищем "Член комиссии", и после него вставляем "Ресурсника"
                 # Это очень сильно зависит от шаблона отчета!
@@ -159,11 +454,19 @@ class ReportProcessor:
                 member_row_col = self.utils.find_cell_by_keywords(sheet, ["Член комиссии", "Член"])
                 if member_row_col:
                     insert_row = member_row_col[0] + 1 # Вставляем после члена комиссии
-                    self._insert_rows(sheet, insert_row, 1) # Вставляем одну строку
+                    self._insert_rows(sheet, [(insert_row, 1)]) # Вставляем одну строку
+                    rows_inserted = True
                     self.log_message(f"Вставлена строка для ресурсника после строки {insert_row-1}.", level="info")
+                    # Строки сдвинулись - индекс меток и раскладка строятся заново
+                    label_index = SheetLabelIndex(sheet)
+                    timer.count("cells_indexed", label_index.cell_count)
+                    template_fingerprint, cached_fields = self._prepare_field_matching(label_index, full_data_for_report, file_name)
                 else:
                     self.log_message("Не удалось найти 'Член комиссии' для вставки строки ресурсника. Заполнение будет произведено в существующие поля.", level="warning")
 
+            timer.lap("row_insertion")
+
+            discovered_fields = {} # {поле: (ячейка метки, ячейка значения)} для пополнения кэша
 
             # Ищем и заполняем поля в отчете
             for data_field, data_value in full_data_for_report.items():
@@ -174,25 +477,26 @@ class ReportProcessor:
                     if re.match(r"^[A-Z]+\d+$", target_coord): # Проверка формата A1
                         found_cell_coords = (sheet[target_coord].row, sheet[target_coord].column)
                 else:
-                    # Ищем поле нечётко
-                    # Предполагаем, что ключевые слова для поиска полей могут быть в заголовках столбцов или рядом
-                    # Проходим по всем ячейкам листа в поисках совпадения
-                    for row_idx in range(1, sheet.max_row + 1):
-                        for col_idx in range(1, sheet.max_column + 1):
-                            cell = sheet.cell(row=row_idx, column=col_idx)
-                            cell_value = str(cell.value).strip() if cell.value is not None else ""
-
-                            matched_keyword, score = self.utils.fuzzy_match(data_field, [cell_value])
-                            if score >= 85: # Высокий порог для прямых совпадений
-                                # Нашли потенциальное поле, теперь ищем ячейку для значения
-                                value_row, value_col = self.utils.find_value_cell(sheet, cell.row, cell.column)
-                                if value_row and value_col:
-                                    # Проверим, что мы не заполняем ту же ячейку снова, если поле уже было найдено
-                                    if (value_row, value_col) not in matched_cells.values():
-                                        found_cell_coords = (value_row, value_col)
-                                        break
-                        if found_cell_coords:
-                            break
+                    if data_field in cached_fields:
+                        # Ячейка из кэша шаблона годится, только если она по-прежнему свободна
+                        cached_coords = coordinate_to_tuple(cached_fields[data_field]["target"])
+                        if (cached_coords not in matched_cells.values()
+                                and self.utils._is_suitable_for_value(sheet.cell(*cached_coords), sheet)):
+                            found_cell_coords = cached_coords
+
+                    if not found_cell_coords:
+                        # Ищем поле нечётко по индексу меток листа: кандидаты
+                        # возвращаются в порядке обхода листа, как при полном переборе
+                        for label_row, label_col in label_index.find(data_field, threshold=85): # Высокий порог для прямых совпадений
+                            # Нашли потенциальное поле, теперь ищем ячейку для значения
+                            value_cell_coords = self.utils.find_value_cell(sheet, label_row, label_col)
+                            # Проверим, что мы не заполняем ту же ячейку снова, если поле уже было найдено
+                            if value_cell_coords and value_cell_coords not in matched_cells.values():
+                                found_cell_coords = value_cell_coords
+                                # Метками шаблона считаем только исходные ячейки, а не записанные значения
+                                if (label_row, label_col) not in matched_cells.values():
+                                    discovered_fields[data_field] = ((label_row, label_col), value_cell_coords)
+                                break
 
                 if found_cell_coords:
                     row, col = found_cell_coords
@@ -200,7 +504,10 @@ class ReportProcessor:
                     if current_cell_value is None or str(current_cell_value).strip() == '':
                         # Записываем значение
                         sheet.cell(row=row, column=col, value=data_value)
+                        self.utils.mark_sheet_modified(sheet)
+                        label_index.add_cell(row, col, data_value) # Записанное значение тоже видно следующим полям
                         matched_cells[data_field] = (row, col)
+                        written_cells[(row, col)] = data_value
                         filled_count += 1
                         # self.log_message(f"  Заполнено поле '{data_field}' в ячейке {get_column_letter(col)}{row} значением '{data_value}'", level="debug")
                     else:
@@ -210,10 +517,18 @@ class ReportProcessor:
                     self.log_message(f"  Не найдено подходящее место для заполнения поля '{data_field}'", level="warning")
 
 
+            timer.lap("field_matching")
+
+            if self.template_cache and discovered_fields:
+                self.template_cache.update(template_fingerprint, label_index, discovered_fields)
+                self.template_cache.save()
+                timer.lap("template_cache")
+
             # Сохранение заполненного отчёта
-            output_file_name = f"{os.path.splitext(file_name)[0]}_FILLED.xlsx"
-            output_path = os.path.join(output_folder, output_file_name)
-            workbook.save(output_path)
+            output_path = self._output_path(report_path, output_folder)
+            output_file_name = os.path.basename(output_path)
+            self._save_filled_report(workbook, sheet, report_path, output_path, written_cells, rows_inserted)
+            timer.lap("save")
             self.log_message(f"Отчёт '{file_name}' успешно заполнен и сохранён как '{output_file_name}'", level="success")
 
             return {
@@ -223,7 +538,10 @@ class ReportProcessor:
                 "message": "Отчёт успешно заполнен",
                 "filled_fields": filled_count,
                 "missing_data_fields": missing_fields,
-                "has_gas": has_gas_in_report
+                "has_gas": has_gas_in_report,
+                "gas_evidence": gas_evidence,
+                "template_fingerprint": template_fingerprint,
+                "output_path": output_path
             }
 
         except Exception as e:
@@ -237,108 +555,301 @@ class ReportProcessor:
                 "missing_data_fields": list(full_data_for_report.keys()) # Все поля могли быть незаполнены
             }
 
+    def _save_filled_report(self, workbook, sheet, report_path, output_path, written_cells, rows_inserted):
+        """
+        Сохраняет заполненный отчёт.
+        В режиме быстрого заполнения исходный файл копируется с правкой только записанных ячеек;
+        после вставки строк (сдвигается весь лист) и при ошибке патча книга сохраняется openpyxl.
+        """
+        if self.fast_fill_enabled and not rows_inserted:
+            try:
+                XlsxCellPatcher(report_path).write(output_path, written_cells, workbook.index(sheet))
+                return
+            except Exception as e:
+                self.log_message(f"Быстрое заполнение '{os.path.basename(report_path)}' не удалось: {e}. Сохраняю через openpyxl.", level="warning")
+        workbook.save(output_path)
+
+    def _prescan_report(self, report_path):
+        """
+        Предварительный просмотр отчёта в режиме read_only (потоковое чтение):
+        строит индекс меток активного листа без полной объектной модели книги.
+        Объединения read_only не читает, поэтому они берутся из XML листа отдельно.
+        """
+        workbook = load_workbook(report_path, read_only=True)
+        try:
+            sheet = workbook.active
+            sheet_index = workbook.index(sheet)
+            label_index = SheetLabelIndex()
+            for row in sheet.iter_rows():
+                for cell in row:
+                    if cell.value is not None: # Пустые ячейки read_only не имеют координат
+                        label_index.add_cell(cell.row, cell.column, cell.value)
+        finally:
+            workbook.close()
+        self._read_merged_ranges(report_path, sheet_index, label_index)
+        return label_index
+
+    @staticmethod
+    def _read_merged_ranges(report_path, sheet_index, label_index):
+        """Добавляет в индекс объединения листа, прочитанные потоково из его XML (<mergeCells>)."""
+        with zipfile.ZipFile(report_path) as report_zip:
+            with report_zip.open(find_sheet_part(report_zip, sheet_index)) as sheet_xml:
+                for _, element in ET.iterparse(sheet_xml):
+                    if element.tag == MERGE_CELL_TAG:
+                        min_col, min_row, max_col, max_row = range_boundaries(element.get('ref'))
+                        label_index.add_merged_range(min_row, min_col, max_row, max_col)
+                    element.clear() # Разобранные строки и ячейки не держим в памяти
+
+    def _prepare_field_matching(self, label_index, full_data_for_report, file_name):
+        """
+        Распознаёт шаблон отчёта по кэшу раскладок и считает матрицу оценок
+        для полей, которых нет ни в ручном сопоставлении, ни в кэше.
+        Возвращает (отпечаток шаблона, {поле: запись кэша}).
+        """
+        template_fingerprint, template_layout = None, None
+        if self.template_cache:
+            template_fingerprint, template_layout = self.template_cache.match(label_index)
+        cached_fields = template_layout["fields"] if template_layout else {}
+        if template_layout:
+            self.log_message(f"Шаблон отчёта '{file_name}' распознан по кэшу раскладок ({len(cached_fields)} полей).", level="info")
+
+        # Оценки всех полей против всех меток считаются одной матрицей
+        label_index.score_fields(
+            [field for field in full_data_for_report
+             if field not in self.manual_field_mappings and field not in cached_fields],
+            threshold=85
+        )
+        return template_fingerprint, cached_fields
+
+    def _report_needs_writing(self, label_index, full_data_for_report, cached_fields, resource_row_required):
+        """
+        Решает по результатам предварительного просмотра, будет ли в отчёт что-то записано:
+        нужна вставка строки, есть ручные сопоставления или известные по кэшу поля,
+        либо хотя бы одно поле нечётко совпало с меткой листа.
+        """
+        if resource_row_required:
+            return True
+        if any(field in self.manual_field_mappings or field in cached_fields for field in full_data_for_report):
+            return True
+        return label_index.has_candidates(threshold=85)
+
+    def refresh_data_file_index(self, data_folder):
+        """
+        Возвращает актуальный индекс файлов данных для `data_folder`:
+        текущий или сохранённый на диске, если папки с тех пор не менялись,
+        иначе строит его заново одним обходом папки и сохраняет рядом с config.ini.
+        """
+        pattern = self.config_manager.get('Regex', 'address_extraction_pattern')
+        cache_file = self.config_manager.get_cache_path('data_file_index.json')
+
+        index = self.data_file_index
+        if index is None or index.data_folder != os.path.abspath(data_folder) or index.address_pattern != pattern:
+            index = DataFileIndex.load(cache_file, data_folder, pattern)
+
+        if index is None or not index.is_current():
+            index = DataFileIndex.build(data_folder, self.utils, pattern)
+            self.log_message(
+                f"Проиндексирована папка с данными {data_folder}: файлов по адресам - {len(index.by_address)}, "
+                f"общий файл: {os.path.basename(index.shared_file) if index.shared_file else 'нет'}", level="info"
+            )
+            try:
+                index.save(cache_file)
+            except OSError as e:
+                self.log_message(f"Не удалось сохранить индекс папки с данными: {e}", level="warning")
+
+        self.data_file_index = index
+        return index
+
     def _find_data_file_for_address(self, base_data_folder, address):
         """
-        Ищет файл данных, содержащий в названии нужную подстроку, в base_data_folder и подпапках.
+        Ищет файл данных ("Объемы выполненных работ по подготовке объекта к эксплуатации")
+        для адреса по индексу папки base_data_folder: сначала файл с этим адресом, затем общий.
+        """
+        index = self.data_file_index
+        if index is None or index.data_folder != os.path.abspath(base_data_folder):
+            return self.refresh_data_file_index(base_data_folder).find(address)
+
+        data_file_path = index.find(address)
+        if self.data_file_index_verified:
+            # В пакете индекс сверен с папкой в начале - промахи не проверяют папки заново
+            return data_file_path if data_file_path and os.path.exists(data_file_path) else None
+        if data_file_path is None or not os.path.exists(data_file_path):
+            # Индекс мог устареть: файлы добавили или удалили после его построения
+            data_file_path = self.refresh_data_file_index(base_data_folder).find(address)
+        return data_file_path
+
+    def _read_xlsx_data_file_streaming(self, file_path):
         """
-        target_substring = "Объемы выполненных работ по подготовке объекта к эксплуатации"
-        for root, dirs, files in os.walk(base_data_folder):
-            for f in files:
-                if (
-                    f.lower().endswith(('.xlsx', '.xls', '.csv'))
-                    and target_substring.lower() in f.lower()
-                ):
-                    return os.path.join(root, f)
-        return None
+        Потоковое чтение первых двух столбцов первого листа .xlsx без построения DataFrame.
+        Заголовок - первая строка листа, даже пустая: так же его берёт pandas, у которого
+        пустые строки листа дополняются пустыми значениями и не пропускаются (см. _read_data_file).
+        """
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            data_dict = {}
+            rows = sheet.iter_rows(max_col=2, values_only=True)
+            next(rows, None) # Заголовок
+            for row in rows:
+                if len(row) < 2 or row[0] is None or row[1] is None:
+                    continue
+                data_dict[str(row[0]).strip()] = str(row[1]).strip()
+            return data_dict
+        finally:
+            workbook.close() # В режиме read_only файл остаётся открытым до close()
+
+    def _data_file_reader(self):
+        """Способ чтения .xlsx файлов данных ([Processing] data_file_reader); входит в ключ кэша файлов данных."""
+        return self.config_manager.get('Processing', 'data_file_reader', 'openpyxl')
 
     def _read_data_file(self, file_path):
         """
         Читает данные из Excel или CSV файла и возвращает их в виде словаря.
         Предполагается, что данные находятся в первом листе, и формат:
         первый столбец - название поля, второй столбец - значение.
+        Файлы .xlsx по умолчанию читаются потоково (openpyxl read_only, без DataFrame);
+        настройка [Processing] data_file_reader = pandas включает чтение через pandas.
         """
-    
+        if file_path.lower().endswith('.xlsx') and self._data_file_reader() != 'pandas':
+            return self._read_xlsx_data_file_streaming(file_path)
+
+        # Читаются только первые два столбца: лишние столбцы не разбираются и не ломают разбор CSV.
+        # Столбцы отбираются по номеру (header=None), поэтому файл из одного столбца не вызывает ошибку
         if file_path.lower().endswith('.csv'):
-            df = pd.read_csv(file_path, header=None, encoding='utf-8')
+            df = pd.read_csv(file_path, header=None, usecols=lambda column: column in (0, 1), encoding='utf-8')
         else:
-            df = pd.read_excel(file_path, engine="openpyxl")
-    
-        data_dict = {}
-        for index, row in df.iterrows():
-            if len(row) >= 2 and pd.notna(row.iloc[0]) and pd.notna(row.iloc[1]):
-                key = str(row.iloc[0]).strip()
-                value = str(row.iloc[1]).strip()
-                data_dict[key] = value
-        return data_dict
-        """
-        Пытается определить наличие газоснабжения в отчете по ключевым словам.
-        Возвращает True, если найдено, False иначе.
-        """
-        for keyword in self.gas_detection_keywords:
-            found_pos = self.utils.find_cell_by_keywords(worksheet, [keyword])
-            if found_pos:
-                # Если ключевое слово найдено, проверяем смещенную ячейку
-                target_row = found_pos[0] + self.gas_cell_offset_y
-                target_col = found_pos[1] + self.gas_cell_offset_x
-                
-                if target_row > 0 and target_col > 0: # Убедимся, что индексы валидны
-                    cell_value = self.utils.get_cell_value(worksheet, target_row, target_col)
-                    if self.utils.get_boolean_from_text(cell_value):
-                        return True
-        return False
-
-    def _insert_rows(self, worksheet, start_row, num_rows):
+            # Первая строка листа - заголовок (как header=0 и в потоковом чтении)
+            df = pd.read_excel(file_path, engine="openpyxl", header=None, usecols=lambda column: column in (0, 1)).iloc[1:]
+
+        if df.shape[1] < 2:
+            return {}
+        # Берём только первые два столбца и отбрасываем неполные строки целиком, без iterrows
+        pairs = df.iloc[:, :2].dropna()
+        keys = pairs.iloc[:, 0].astype(str).str.strip()
+        values = pairs.iloc[:, 1].astype(str).str.strip()
+        return dict(zip(keys, values))
+
+    def _insert_rows(self, worksheet, insertions):
         """
-        Вставляет `num_rows` пустых строк, начиная со `start_row`.
-        Корректирует объединенные ячейки, которые пересекаются с точкой вставки.
+        Вставляет пустые строки в лист за один проход.
+        `insertions` - список (start_row, num_rows) в исходной нумерации строк.
+        Ячейки, объединённые диапазоны, высоты строк и стили сдвигаются вместе (см. RowInsertionPlanner).
+        Кэши листа в self.utils сбрасывает сам планировщик.
         """
-        # Сдвигаем все строки ниже start_row
-        worksheet.insert_rows(start_row, num_rows)
-
-        # Корректируем объединенные ячейки
-        # Важно: openpyxl.insert_rows обычно сам корректирует объединенные ячейки,
-        # но сложные случаи могут потребовать ручной обработки.
-        # Для базового случая insert_rows должен сработать.
-        # Дополнительная проверка на всякий случай
-        for merged_range_str in list(worksheet.merged_cells.ranges): # Создаем копию списка, т.к. будем изменять
-            merged_range = CellRange(merged_range_str)
-            if merged_range.min_row >= start_row:
-                # Если объединенная ячейка находится полностью ниже точки вставки, просто сдвигаем
-                new_min_row = merged_range.min_row + num_rows
-                new_max_row = merged_range.max_row + num_rows
-                new_range = CellRange(min_col=merged_range.min_col, max_col=merged_range.max_col,
-                                      min_row=new_min_row, max_row=new_max_row)
-                worksheet.merged_cells.remove(merged_range_str)
-                worksheet.merged_cells.add(str(new_range))
-            elif merged_range.min_row < start_row <= merged_range.max_row:
-                # Если точка вставки внутри объединенной ячейки, расширяем ее
-                new_max_row = merged_range.max_row + num_rows
-                new_range = CellRange(min_col=merged_range.min_col, max_col=merged_range.max_col,
-                                      min_row=merged_range.min_row, max_row=new_max_row)
-                worksheet.merged_cells.remove(merged_range_str)
-                worksheet.merged_cells.add(str(new_range))
+        planner = RowInsertionPlanner(worksheet, self.utils)
+        for start_row, num_rows in insertions:
+            planner.add(start_row, num_rows)
+        return planner.apply()
 
 
     def _generate_processing_report(self, output_folder, results):
-        """Генерирует Excel-отчёт о результатах обработки."""
+        """
+        Генерирует Excel-отчёт о результатах обработки.
+        Лист "Отчёты" - результат и длительность этапов каждого отчёта;
+        листы "Этапы" и "Счётчики" - сводка по всему пакету.
+        """
         report_data = []
         for res in results:
-            report_data.append({
+            row = {
                 "Файл отчёта": res["file"],
                 "Адрес": res["address"],
                 "Статус": res["status"],
                 "Сообщение": res["message"],
                 "Заполнено полей": res["filled_fields"],
                 "Незаполненные поля (из данных)": ", ".join(res["missing_data_fields"]),
-                "Наличие газа в отчёте": "Да" if res.get("has_gas") else "Нет"
-            })
+                "Наличие газа в отчёте": "Да" if res.get("has_gas") else "Нет",
+                "Основание (газ)": res.get("gas_evidence") or ""
+            }
+            timings = res.get("timings", {})
+            for stage, label in STAGE_LABELS.items():
+                row[f"{label}, с"] = timings.get(stage, 0.0)
+            report_data.append(row)
 
         df = pd.DataFrame(report_data)
         report_file_name = f"Отчёт_об_обработке_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         report_path = os.path.join(output_folder, report_file_name)
 
         try:
-            df.to_excel(report_path, index=False)
+            with pd.ExcelWriter(report_path) as writer:
+                df.to_excel(writer, sheet_name="Отчёты", index=False)
+                self._stage_summary(results).to_excel(writer, sheet_name="Этапы", index=False)
+                self._counter_summary(results).to_excel(writer, sheet_name="Счётчики", index=False)
             self.log_message(f"Отчёт об обработке успешно создан: {report_path}", level="success")
         except Exception as e:
-            self.log_message(f"Ошибка при создании отчёта об обработке: {e}", level="error")
\ No newline at end of file
+            self.log_message(f"Ошибка при создании отчёта об обработке: {e}", level="error")
+
+    def _stage_summary(self, results):
+        """Сводка по этапам обработки: сумма, среднее, медиана, 95-й перцентиль, максимум и доля времени."""
+        timings = pd.DataFrame([res.get("timings", {}) for res in results])
+        rows = []
+        total_time = timings["total"].sum() if "total" in timings else 0.0
+        for stage, label in STAGE_LABELS.items():
+            if stage not in timings:
+                continue
+            column = timings[stage].dropna()
+            rows.append({
+                "Этап": label,
+                "Отчётов": len(column),
+                "Всего, с": round(column.sum(), 3),
+                "Среднее, с": round(column.mean(), 4),
+                "Медиана, с": round(column.median(), 4),
+                "95-й перцентиль, с": round(column.quantile(0.95), 4),
+                "Максимум, с": round(column.max(), 4),
+                "Доля времени, %": round(100 * column.sum() / total_time, 1) if total_time else 0.0
+            })
+        return pd.DataFrame(rows)
+
+    def _counter_summary(self, results):
+        """Сводка по счётчикам работы (ячейки, нечёткие сравнения) за пакет."""
+        counters = pd.DataFrame([res.get("counters", {}) for res in results])
+        rows = []
+        for counter, label in COUNTER_LABELS.items():
+            if counter not in counters:
+                continue
+            column = counters[counter].dropna()
+            rows.append({
+                "Счётчик": label,
+                "Всего": int(column.sum()),
+                "В среднем на отчёт": round(column.mean(), 1),
+                "Максимум": int(column.max())
+            })
+        return pd.DataFrame(rows)
+
+
+# --- Параллельная обработка: состояние и функции процессов пула ---
+# Функции должны быть на уровне модуля, чтобы их можно было передать в дочерний процесс.
+_worker_processor = None
+_worker_log = []
+
+
+def _collect_worker_log(message, level="info"):
+    """Накапливает сообщения журнала процесса до возврата результата."""
+    _worker_log.append((message, level))
+
+
+def _init_report_worker(config_file, config_snapshot, commission_types, address_to_commission_map, data_file_index):
+    """
+    Инициализатор процесса пула: один раз создаёт ConfigManager, CommissionManager
+    и ReportProcessor с данными (и индексом файлов данных), переданными из основного процесса.
+    """
+    global _worker_processor
+    from config_manager import ConfigManager
+    from commission_manager import CommissionManager
+    from utils import Utils
+
+    config_manager = ConfigManager(config_file)
+    config_manager.config.read_dict(config_snapshot) # Несохранённые изменения основного процесса
+    # С настройками основного процесса (порог поиска адреса и т.п.), но без загрузки файлов - данные переданы
+    commission_manager = CommissionManager(config_manager, _collect_worker_log, load_data=False)
+    commission_manager.commission_types = commission_types
+    commission_manager.address_to_commission_map = address_to_commission_map
+    _worker_processor = ReportProcessor(config_manager, commission_manager, Utils(config_manager), _collect_worker_log)
+    _worker_processor.data_file_index = data_file_index
+    _worker_processor.data_file_index_verified = True # Индекс сверен с папкой основным процессом
+
+
+def _process_report_in_worker(report_path, data_folder, output_folder):
+    """Обрабатывает один отчёт в процессе пула. Возвращает (результат, сообщения журнала)."""
+    del _worker_log[:]
+    result = _worker_processor.process_single_report(report_path, data_folder, output_folder)
+    return result, list(_worker_log)
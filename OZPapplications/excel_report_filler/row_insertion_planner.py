@@ -0,0 +1,130 @@
+import copy
+from bisect import bisect_right
+
+from openpyxl.cell.cell import MergedCell
+from openpyxl.worksheet.cell_range import MultiCellRange
+
+
+class RowInsertionPlanner:
+    """
+    Планировщик вставки строк в лист openpyxl.
+    Собирает все вставки для листа (в исходной нумерации строк) и применяет их за один проход:
+    ячейки, объединённые диапазоны, высоты строк и стили сдвигаются вместе.
+    Сдвиг строки вычисляется бинарным поиском по префиксным суммам вставок,
+    поэтому стоимость не растёт квадратично с числом вставок (в отличие от
+    повторных вызовов worksheet.insert_rows и пересборки объединений после каждого).
+
+    Вставка (row, count) означает: перед исходной строкой `row` вставить `count` пустых строк.
+    Новые строки получают высоту и стили ячеек строки над ними; объединение,
+    внутрь которого попала вставка, расширяется.
+    Если передан `utils`, после вставки сбрасываются его кэши листа (utils.invalidate_sheet_cache).
+    """
+    def __init__(self, worksheet, utils=None):
+        self.worksheet = worksheet
+        self.utils = utils
+        self.insertions = {} # {исходная строка: число вставляемых строк}
+
+    def add(self, start_row, num_rows=1):
+        """Планирует вставку `num_rows` строк перед исходной строкой `start_row`."""
+        if num_rows > 0:
+            self.insertions[start_row] = self.insertions.get(start_row, 0) + num_rows
+
+    def apply(self):
+        """Применяет все запланированные вставки. Возвращает список номеров новых (пустых) строк."""
+        if not self.insertions:
+            return []
+        self._points = sorted(self.insertions)
+        self._shifts = [] # _shifts[i] - суммарный сдвиг строк, стоящих не выше _points[i]
+        total = 0
+        for point in self._points:
+            total += self.insertions[point]
+            self._shifts.append(total)
+
+        # Новые строки и строки-образцы (над точкой вставки) в новой нумерации
+        new_rows = {}
+        for point in self._points:
+            first_new_row = point + self.shift(point - 1)
+            for offset in range(self.insertions[point]):
+                new_rows[first_new_row + offset] = point - 1 + self.shift(point - 1)
+
+        self._shift_cells()
+        grown_ranges = self._shift_merged_ranges()
+        self._shift_row_dimensions(new_rows)
+        self._copy_row_styles(new_rows)
+        self._fill_grown_ranges(grown_ranges)
+        self.insertions = {}
+        if self.utils:
+            # Ячейки и объединения сдвинулись - индексы и результаты поиска по листу устарели
+            self.utils.invalidate_sheet_cache(self.worksheet)
+        return sorted(new_rows)
+
+    def shift(self, row):
+        """Сдвиг, который получает исходная строка `row`."""
+        index = bisect_right(self._points, row)
+        return self._shifts[index - 1] if index else 0
+
+    def _shift_cells(self):
+        worksheet = self.worksheet
+        shifted_cells = {}
+        for (row, col), cell in worksheet._cells.items():
+            new_row = row + self.shift(row)
+            cell.row = new_row
+            shifted_cells[(new_row, col)] = cell
+        worksheet._cells = shifted_cells
+
+    def _shift_merged_ranges(self):
+        """Сдвигает объединения; возвращает расширившиеся (вставка попала внутрь них)."""
+        grown_ranges = []
+        merged_ranges = list(self.worksheet.merged_cells.ranges)
+        for merged_range in merged_ranges:
+            min_shift = self.shift(merged_range.min_row)
+            max_shift = self.shift(merged_range.max_row)
+            merged_range.min_row += min_shift
+            merged_range.max_row += max_shift
+            if max_shift != min_shift:
+                grown_ranges.append(merged_range)
+        # Множество объединений хэширует диапазоны по границам - после сдвига собираем его заново
+        self.worksheet.merged_cells = MultiCellRange(merged_ranges)
+        return grown_ranges
+
+    def _shift_row_dimensions(self, new_rows):
+        row_dimensions = self.worksheet.row_dimensions
+        dimensions = list(row_dimensions.items())
+        row_dimensions.clear()
+        for row, dimension in dimensions:
+            dimension.index = row + self.shift(row)
+            row_dimensions[dimension.index] = dimension
+
+        for new_row, source_row in new_rows.items():
+            source = row_dimensions.get(source_row)
+            if source is not None:
+                dimension = copy.copy(source)
+                dimension.index = new_row
+                row_dimensions[new_row] = dimension
+
+    def _copy_row_styles(self, new_rows):
+        worksheet = self.worksheet
+        source_rows = set(new_rows.values())
+        source_cells = {}
+        for (row, col), cell in worksheet._cells.items():
+            if row in source_rows and cell.has_style:
+                source_cells.setdefault(row, []).append((col, cell))
+
+        for new_row, source_row in new_rows.items():
+            for col, source in source_cells.get(source_row, []):
+                worksheet.cell(row=new_row, column=col)._style = copy.copy(source._style)
+
+    def _fill_grown_ranges(self, grown_ranges):
+        """Ячейки, попавшие внутрь расширившегося объединения, становятся MergedCell."""
+        worksheet = self.worksheet
+        for merged_range in grown_ranges:
+            anchor = (merged_range.min_row, merged_range.min_col)
+            for row in range(merged_range.min_row, merged_range.max_row + 1):
+                for col in range(merged_range.min_col, merged_range.max_col + 1):
+                    if (row, col) == anchor or isinstance(worksheet._cells.get((row, col)), MergedCell):
+                        continue
+                    merged_cell = MergedCell(worksheet, row=row, column=col)
+                    source = worksheet._cells.get((row, col))
+                    if source is not None:
+                        merged_cell._style = copy.copy(source._style)
+                    worksheet._cells[(row, col)] = merged_cell
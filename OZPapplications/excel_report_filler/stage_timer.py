@@ -0,0 +1,98 @@
+import contextlib
+import heapq
+import marshal
+import os
+import re
+import threading
+import time
+
+_active = threading.local() # Таймер отчёта, обрабатываемого в текущем потоке (см. StageTimer.active)
+
+
+class StageTimer:
+    """
+    Замер длительности этапов обработки одного отчёта по монотонным часам.
+    Этапы идут друг за другом: lap(имя) записывает время, прошедшее с предыдущей отметки,
+    на этап `имя` (повторные этапы с тем же именем суммируются).
+    Дополнительно хранит счётчики (просмотренные ячейки, нечёткие сравнения и т.п.).
+    Код, у которого нет ссылки на таймер (Utils), считает через StageTimer.count_active -
+    в таймер, активный в текущем потоке, поэтому параллельные задачи не смешивают счётчики.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._mark = self.started
+        self.spans = {} # {этап: секунды}
+        self.counters = {} # {счётчик: значение}
+
+    def lap(self, name):
+        """Закрывает текущий этап под именем `name` и начинает следующий."""
+        now = time.perf_counter()
+        self.spans[name] = self.spans.get(name, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def active(self):
+        """Делает таймер активным в текущем потоке на время блока with."""
+        previous = getattr(_active, "timer", None)
+        _active.timer = self
+        try:
+            yield self
+        finally:
+            _active.timer = previous
+
+    @staticmethod
+    def count_active(name, value=1):
+        """Добавляет к счётчику таймера, активного в текущем потоке (если такого нет - ничего не делает)."""
+        timer = getattr(_active, "timer", None)
+        if timer is not None:
+            timer.count(name, value)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def to_dict(self):
+        """Этапы в секундах (с общим временем "total"), пригодные для результата и отчёта."""
+        spans = {name: round(seconds, 6) for name, seconds in self.spans.items()}
+        spans["total"] = round(self.total(), 6)
+        return spans
+
+
+class SlowestProfiles:
+    """
+    Хранит профили cProfile самых медленных отчётов пакета (не больше `limit`)
+    и сохраняет их в файлы .pstats (открываются через pstats.Stats или snakeviz).
+    """
+    def __init__(self, limit=5):
+        self.limit = limit
+        self._heap = [] # (время отчёта, порядковый номер, файл отчёта, статистика профиля)
+        self._counter = 0
+
+    def add(self, result):
+        """Забирает профиль из результата отчёта (ключ "profile_stats") и оставляет его, если отчёт среди самых медленных."""
+        stats = result.pop("profile_stats", None)
+        if stats is None or self.limit <= 0:
+            return
+        total = result.get("timings", {}).get("total", 0.0)
+        self._counter += 1
+        entry = (total, self._counter, result.get("file", ""), stats)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def dump(self, folder):
+        """Сохраняет профили в `folder`, от самого медленного. Возвращает список путей."""
+        if not self._heap:
+            return []
+        os.makedirs(folder, exist_ok=True)
+        paths = []
+        for place, (total, _, file_name, stats) in enumerate(sorted(self._heap, reverse=True), start=1):
+            safe_name = re.sub(r'[^\w.()-]+', '_', os.path.splitext(file_name)[0])
+            path = os.path.join(folder, f"{place:02d}_{total:.2f}s_{safe_name}.pstats")
+            with open(path, 'wb') as f:
+                marshal.dump(stats, f) # Тот же формат, что у cProfile.Profile.dump_stats
+            paths.append(path)
+        return paths
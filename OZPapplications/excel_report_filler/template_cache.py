@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+
+from openpyxl.utils import coordinate_to_tuple, get_column_letter
+
+
+class TemplateLayoutCache:
+    """
+    Кэш раскладок шаблонов отчётов.
+    Для каждого известного шаблона хранит его метки (координата -> нормализованный текст)
+    и найденные ранее ячейки для полей: {поле: {"label": "A11", "target": "AF11"}}.
+    Шаблон определяется отпечатком - хэшем текстов меток и их координат.
+    Кэш хранится в JSON-файле рядом с файлом настроек.
+    """
+    def __init__(self, cache_file, log_callback=None):
+        self.cache_file = cache_file
+        self.log_message = log_callback if log_callback else print
+        # templates: {отпечаток: {"labels": {координата: текст}, "fields": {поле: {"label": ..., "target": ...}}}}
+        self.templates = {}
+        # Отпечатки, заменённые новыми при дополнении раскладки (удаляются и с диска)
+        self._replaced = set()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Загружает кэш раскладок с диска (если файл есть)."""
+        self.templates = self._read_file()
+        self._dirty = False
+
+    def _read_file(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            self.log_message(f"Не удалось прочитать кэш шаблонов {self.cache_file}: {e}. Кэш будет создан заново.", level="warning")
+            return {}
+
+    def save(self):
+        """
+        Сохраняет кэш, если он изменился.
+        Перед записью объединяется с файлом на диске (его могли дополнить другие процессы);
+        запись атомарная - через временный файл.
+        """
+        if not self._dirty:
+            return
+        try:
+            templates = self._read_file()
+            for fingerprint in self._replaced:
+                templates.pop(fingerprint, None)
+            templates.update(self.templates)
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(templates, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_file, self.cache_file)
+            self.templates = templates
+            self._replaced.clear()
+            self._dirty = False
+        except OSError as e:
+            self.log_message(f"Ошибка при сохранении кэша шаблонов {self.cache_file}: {e}", level="error")
+
+    @staticmethod
+    def fingerprint(labels):
+        """Отпечаток шаблона: хэш отсортированных пар (координата, текст метки)."""
+        payload = json.dumps(sorted(labels.items()), ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def match(self, label_index):
+        """
+        Ищет известный шаблон, все метки которого стоят на своих местах в листе.
+        `label_index` - SheetLabelIndex листа.
+        Возвращает (отпечаток, раскладка) или (None, None).
+        Если подходят несколько шаблонов, выбирается шаблон с наибольшим числом меток.
+        """
+        best_fingerprint, best_layout = None, None
+        for fingerprint, layout in self.templates.items():
+            labels = layout.get("labels", {})
+            if not labels:
+                continue
+            if best_layout and len(labels) <= len(best_layout["labels"]):
+                continue
+            if all(label_index.text_at(*coordinate_to_tuple(coord)) == text for coord, text in labels.items()):
+                best_fingerprint, best_layout = fingerprint, layout
+        return best_fingerprint, best_layout
+
+    def update(self, fingerprint, label_index, discovered_fields):
+        """
+        Дополняет раскладку шаблона полями, найденными обычным поиском.
+        `fingerprint` - отпечаток совпавшего шаблона или None для нового шаблона.
+        `discovered_fields` - {поле: ((label_row, label_col), (target_row, target_col))}.
+        Так как набор меток меняется, шаблон сохраняется под новым отпечатком.
+        """
+        if not discovered_fields:
+            return fingerprint
+
+        layout = self.templates.pop(fingerprint, None) if fingerprint else None
+        if layout is not None:
+            self._replaced.add(fingerprint)
+        else:
+            layout = {"labels": {}, "fields": {}}
+        for field, (label_coords, target_coords) in discovered_fields.items():
+            label_coord = f"{get_column_letter(label_coords[1])}{label_coords[0]}"
+            layout["labels"][label_coord] = label_index.text_at(*label_coords)
+            layout["fields"][field] = {
+                "label": label_coord,
+                "target": f"{get_column_letter(target_coords[1])}{target_coords[0]}"
+            }
+
+        new_fingerprint = self.fingerprint(layout["labels"])
+        self.templates[new_fingerprint] = layout
+        self._dirty = True
+        return new_fingerprint
@@ -0,0 +1,75 @@
+"""
+Потоковое чтение .xlsx файлов данных (по умолчанию) и чтение через pandas
+([Processing] data_file_reader = pandas) дают одинаковые данные, в том числе
+при пустых строках перед заголовком и посреди данных, лишних столбцах и листе из одного столбца.
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+
+from commission_manager import CommissionManager
+from config_manager import ConfigManager
+from report_processor import ReportProcessor
+from utils import Utils
+
+LAYOUTS = {
+    "header_in_first_row": [["Поле", "Значение"], ["Площадь", 12], ["Этажность", "5"]],
+    "blank_rows_before_header": [None, None, ["Поле", "Значение"], ["Площадь", 12]],
+    "data_in_first_row": [["Площадь", 12], ["Этажность", 5], ["Год постройки", 1975]],
+    "blank_and_incomplete_rows": [["Поле", "Значение"], None, ["Площадь", 12.5], ["Без значения"], ["Этажность", 5]],
+    "extra_columns": [["Поле", "Значение", "Примечание"], ["Площадь", 12, "м²"], [None, None, "только примечание"]],
+    "one_column": [["Поле"], ["Площадь"]],
+    "header_only": [["Поле", "Значение"]],
+}
+
+
+class DataFileReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        log = lambda message, level="info": None
+        config_manager = ConfigManager(os.path.join(self.folder, "config.ini"))
+        self.processor = ReportProcessor(config_manager, CommissionManager(config_manager, log, load_data=False),
+                                         Utils(config_manager), log)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write_data_file(self, name, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        for row_idx, row in enumerate(rows, start=1):
+            for col_idx, value in enumerate(row or [], start=1):
+                if value is not None:
+                    sheet.cell(row=row_idx, column=col_idx, value=value)
+        path = os.path.join(self.folder, f"{name}.xlsx")
+        workbook.save(path)
+        return path
+
+    def read(self, path, reader):
+        self.processor.config_manager.config["Processing"]["data_file_reader"] = reader
+        return self.processor._read_data_file(path)
+
+    def test_readers_match(self):
+        for name, rows in LAYOUTS.items():
+            with self.subTest(name):
+                path = self.write_data_file(name, rows)
+                self.assertEqual(self.read(path, "openpyxl"), self.read(path, "pandas"))
+
+    def test_header_is_first_row(self):
+        path = self.write_data_file("blank_rows_before_header", LAYOUTS["blank_rows_before_header"])
+        self.assertEqual(self.read(path, "openpyxl"), {"Поле": "Значение", "Площадь": "12"})
+        path = self.write_data_file("data_in_first_row", LAYOUTS["data_in_first_row"])
+        self.assertEqual(self.read(path, "pandas"), {"Этажность": "5", "Год постройки": "1975"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Пакетные оценки Utils.fuzzy_score_matrix совпадают с попарным fuzz.ratio (fuzzywuzzy + python-Levenshtein),
+в том числе на оценках с дробной частью .5, которые округляются к чётному.
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+"""
+import difflib
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzywuzzy import fuzz
+
+import utils as utils_module
+from utils import Utils
+
+
+def random_strings(rnd, count):
+    alphabet = "абвгд ежз,."
+    return ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12))) for _ in range(count)]
+
+
+@unittest.skipIf(utils_module.rapidfuzz_process is None, "rapidfuzz не установлен")
+class FuzzyScoreMatrixTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(0)
+        self.queries = random_strings(rnd, 60)
+        self.choices = random_strings(rnd, 80) + ["АБВ", "абв"]
+
+    def test_rounding_matches_round(self):
+        matrix = Utils.fuzzy_score_matrix(self.queries, self.choices)
+        expected = [[int(round(utils_module.rapidfuzz_fuzz.ratio(query.lower(), choice.lower())))
+                     for choice in self.choices] for query in self.queries]
+        self.assertEqual(matrix.tolist(), expected)
+
+    def test_score_cutoff(self):
+        matrix = Utils.fuzzy_score_matrix(self.queries, self.choices)
+        cut = Utils.fuzzy_score_matrix(self.queries, self.choices, score_cutoff=50)
+        self.assertEqual(cut.tolist(), [[score if score >= 50 else 0 for score in row] for row in matrix.tolist()])
+
+    @unittest.skipIf(fuzz.SequenceMatcher is difflib.SequenceMatcher, "fuzzywuzzy без python-Levenshtein")
+    def test_matches_fuzzywuzzy(self):
+        matrix = Utils.fuzzy_score_matrix(self.queries, self.choices)
+        expected = [[fuzz.ratio(query.lower(), choice.lower()) for choice in self.choices] for query in self.queries]
+        self.assertEqual(matrix.tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Кэш поиска ключевых слов Utils.find_cells_by_keywords: повторный поиск по неизменённому листу
+не обходит лист заново, а запись в ячейку (mark_sheet_modified) и вставка строк делают
+новые значения видимыми следующему поиску.
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from row_insertion_planner import RowInsertionPlanner
+from stage_timer import StageTimer
+from utils import Utils
+
+
+class KeywordCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.utils = Utils()
+        self.sheet = Workbook().active
+        self.sheet["A1"] = "Председатель комиссии"
+        self.sheet["A3"] = "Член комиссии"
+        self.sheet["B3"].font = Font(bold=True) # Существующая пустая ячейка: число ячеек листа не меняется при записи
+
+    def find(self):
+        timer = StageTimer()
+        with timer.active():
+            hits = self.utils.find_cells_by_keywords(self.sheet, ["Член", "Председатель"])
+        return hits, timer.counters.get("cells_scanned", 0)
+
+    def test_repeated_lookup_uses_cache(self):
+        first, scanned = self.find()
+        self.assertEqual(first, {"Член": [(3, 1)], "Председатель": [(1, 1)]})
+        self.assertGreater(scanned, 0)
+        second, scanned = self.find()
+        self.assertEqual(second, first)
+        self.assertEqual(scanned, 0)
+
+    def test_write_after_lookup_is_visible(self):
+        self.find()
+        self.sheet["B3"] = "член бригады"
+        self.utils.mark_sheet_modified(self.sheet)
+        hits, scanned = self.find()
+        self.assertGreater(scanned, 0)
+        self.assertEqual(hits["Член"], [(3, 1), (3, 2)])
+
+    def test_row_insertion_is_visible(self):
+        self.find()
+        planner = RowInsertionPlanner(self.sheet, self.utils)
+        planner.add(2)
+        planner.apply()
+        hits, _ = self.find()
+        self.assertEqual(hits, {"Член": [(4, 1)], "Председатель": [(1, 1)]})
+
+
+if __name__ == "__main__":
+    unittest.main()
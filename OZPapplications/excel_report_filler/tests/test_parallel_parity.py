@@ -0,0 +1,107 @@
+"""
+Параллельная обработка (пул процессов) должна давать тот же результат, что и последовательная,
+в том числе с настройками, которые процессы пула получают от основного процесса
+(здесь - нестандартный порог нечёткого поиска адреса).
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import load_workbook
+
+from benchmarks.passport_generator import PassportGenerator
+from commission_manager import CommissionManager
+from config_manager import ConfigManager
+from report_processor import ReportProcessor
+from utils import Utils
+
+CONFIG_TEMPLATE = """[Paths]
+reports_folder = {reports_folder}
+data_folder = {data_folder}
+output_folder = {output_folder}
+commission_types_file = {commission_types_file}
+address_map_file = {address_map_file}
+
+[Regex]
+address_extraction_pattern = \\(([^)]+)\\)
+gas_detection_keywords = газ,газоснабжение,газопровод
+gas_detection_cell_offset_x = 0
+gas_detection_cell_offset_y = 1
+
+[FieldMapping]
+
+[Processing]
+address_match_threshold = 70
+
+[Cache]
+template_cache = false
+report_catalog = false
+commission_cache_on_disk = false
+"""
+# Ключи результата, которые отличаются от запуска к запуску (замеры, папка сохранения)
+VOLATILE_KEYS = ("timings", "counters", "profile_stats", "output_path")
+
+
+def output_values(output_folder):
+    """{имя заполненного файла: {координата: значение}}."""
+    values = {}
+    for path in sorted(glob.glob(os.path.join(output_folder, "*_FILLED.xlsx"))):
+        sheet = load_workbook(path).active
+        values[os.path.basename(path)] = {
+            cell.coordinate: cell.value for row in sheet.iter_rows() for cell in row if cell.value is not None
+        }
+    return values
+
+
+class ParallelParityTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.paths = PassportGenerator(seed=1, variants=2).generate(self.folder, 4)
+        # В файле сопоставления адрес записан иначе ("Сад ул" вместо "Садовая ул"): оценка нечёткого
+        # поиска (80) проходит порог 70 из настроек, но не проходит порог по умолчанию (85)
+        rows = [list(row) for row in load_workbook(self.paths["address_map_file"]).active.iter_rows(values_only=True)]
+        for row in rows[1:]:
+            row[0] = row[0].replace("Садовая ул", "Сад ул")
+        PassportGenerator._write_table(self.paths["address_map_file"], rows)
+        self.paths["output_folder"] = os.path.join(self.folder, "out")
+        self.config_file = os.path.join(self.folder, "config.ini")
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write(CONFIG_TEMPLATE.format(**self.paths))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def process(self, workers):
+        output_folder = os.path.join(self.folder, f"out_{workers}")
+        os.makedirs(output_folder)
+        log = lambda message, level="info": None
+        config_manager = ConfigManager(self.config_file)
+        processor = ReportProcessor(config_manager, CommissionManager(config_manager, log), Utils(config_manager), log)
+        processor.scan_reports(self.paths["reports_folder"])
+        processor.report_files.sort()
+        results = processor.process_all_reports(self.paths["reports_folder"], self.paths["data_folder"],
+                                                output_folder, workers=workers)
+        results = [{k: v for k, v in res.items() if k not in VOLATILE_KEYS} for res in results]
+        return results, output_values(output_folder)
+
+    def test_workers_match_sequential(self):
+        sequential_results, sequential_values = self.process(workers=1)
+        parallel_results, parallel_values = self.process(workers=2)
+
+        # Комиссия для адреса "Садовая ул" найдена только с порогом из настроек
+        filled_names = {value for cells in sequential_values.values() for value in cells.values()}
+        self.assertIn("С.В.Кочевалин", filled_names)
+        self.assertEqual(parallel_results, sequential_results)
+        self.assertEqual(parallel_values, sequential_values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Предварительный просмотр отчёта (ReportProcessor._prescan_report, режим read_only)
+строит тот же индекс меток и объединений, что и полная загрузка книги.
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+
+from commission_manager import CommissionManager
+from config_manager import ConfigManager
+from report_processor import ReportProcessor
+from utils import SheetLabelIndex, Utils
+
+# Отчёт из корня репозитория: сохранён Excel (префиксы пространств имён, общие строки)
+SAMPLE_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Отчет.xlsx")
+
+
+class PrescanTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        log = lambda message, level="info": None
+        config_manager = ConfigManager(os.path.join(self.folder, "config.ini"))
+        self.processor = ReportProcessor(config_manager, CommissionManager(config_manager, log, load_data=False),
+                                         Utils(config_manager), log)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def assert_prescan_matches_full_load(self, report_path):
+        expected = SheetLabelIndex(load_workbook(report_path).active)
+        label_index = self.processor._prescan_report(report_path)
+        self.assertEqual(label_index.cells, expected.cells)
+        self.assertEqual(label_index.merged_anchors, expected.merged_anchors)
+        return label_index
+
+    def test_merged_ranges_of_active_sheet(self):
+        workbook = Workbook()
+        workbook.active["A1"] = "Первый лист"
+        workbook.active.merge_cells("A1:C1")
+        sheet = workbook.create_sheet("Паспорт")
+        sheet["A1"] = "Паспорт готовности"
+        sheet.merge_cells("A1:D1")
+        sheet["A3"] = "Председатель"
+        sheet.merge_cells("B3:C4")
+        sheet.merge_cells("E5:E7")
+        workbook.active = 1 # Активен второй лист: объединения берутся из его XML, а не из первого
+        report_path = os.path.join(self.folder, "report.xlsx")
+        workbook.save(report_path)
+
+        label_index = self.assert_prescan_matches_full_load(report_path)
+        self.assertEqual(label_index.value_at(1, 4), "паспорт готовности")
+        self.assertEqual(label_index.merged_anchors[(4, 3)], (3, 2))
+
+    @unittest.skipUnless(os.path.exists(SAMPLE_REPORT), "нет файла Отчет.xlsx")
+    def test_excel_saved_report(self):
+        self.assert_prescan_matches_full_load(SAMPLE_REPORT)
+
+
+if __name__ == "__main__":
+    unittest.main()
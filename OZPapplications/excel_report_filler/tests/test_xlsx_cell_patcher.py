@@ -0,0 +1,128 @@
+"""
+Проверка быстрого заполнения: файл, записанный XlsxCellPatcher, открывается openpyxl
+и содержит те же значения, что исходный файл с применёнными правками.
+
+Запуск из папки excel_report_filler:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from xlsx_cell_patcher import XlsxCellPatcher, find_sheet_part
+
+# Отчёт из корня репозитория: сохранён Excel (общие строки, стили), в отличие от файлов openpyxl
+SAMPLE_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Отчет.xlsx")
+
+
+def sheet_values(worksheet):
+    """{(row, col): значение} всех непустых ячеек листа."""
+    return {(cell.row, cell.column): cell.value
+            for row in worksheet.iter_rows() for cell in row if cell.value is not None}
+
+
+def sheet_xml(path, sheet_index):
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(find_sheet_part(archive, sheet_index)).decode('utf-8')
+
+
+class XlsxCellPatcherRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.folder, "source.xlsx")
+        self.output_path = os.path.join(self.folder, "output.xlsx")
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = "Паспорт"
+        sheet["A1"] = "Паспорт готовности"
+        sheet.merge_cells("A1:D1")
+        sheet["A3"] = "Председатель"
+        sheet["B3"] = "старое значение"
+        sheet["B3"].font = Font(bold=True)
+        sheet["A5"] = "Площадь"
+        sheet["C5"] = 12.5
+        sheet["A9"] = "Газоснабжение"
+        sheet.row_dimensions[7].height = 30 # Строка <row r="7" ...> без ячеек
+        second = workbook.create_sheet("Данные")
+        second["A1"] = "Поле"
+        second["B1"] = "Значение"
+        workbook.save(self.source_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def assert_round_trip(self, cell_values, sheet_index=0):
+        source_workbook = load_workbook(self.source_path)
+        expected = [sheet_values(sheet) for sheet in source_workbook.worksheets]
+        expected[sheet_index].update(cell_values)
+
+        XlsxCellPatcher(self.source_path).write(self.output_path, cell_values, sheet_index)
+
+        with zipfile.ZipFile(self.output_path) as output_zip:
+            self.assertIsNone(output_zip.testzip()) # CRC всех записей архива сходятся
+        output_workbook = load_workbook(self.output_path)
+        self.assertEqual([sheet.title for sheet in output_workbook.worksheets],
+                         [sheet.title for sheet in source_workbook.worksheets])
+        self.assertEqual([sheet_values(sheet) for sheet in output_workbook.worksheets], expected)
+        # В режиме read_only размеры листа берутся из <dimension>: записанные ячейки не должны теряться
+        read_only_workbook = load_workbook(self.output_path, read_only=True)
+        self.assertEqual(sheet_values(read_only_workbook.worksheets[sheet_index]), expected[sheet_index])
+        read_only_workbook.close()
+        return output_workbook
+
+    def test_existing_empty_and_new_cells(self):
+        output_workbook = self.assert_round_trip({
+            (3, 2): "Иванов И.И.",         # Замена значения существующей ячейки
+            (5, 2): "45,6 м²",              # Новая ячейка в существующей строке (между A5 и C5)
+            (7, 1): "в пустой строке",      # Строка есть в XML, но без ячеек
+            (8, 3): 'кавычки "<&>"',        # Новая строка между существующими
+            (20, 1): 42,                    # Новая строка после последней
+            (9, 2): True,
+        })
+        sheet = output_workbook.worksheets[0]
+        self.assertTrue(sheet["B3"].font.bold) # Стиль заменённой ячейки сохранён
+        self.assertIn("A1:D1", [str(merged) for merged in sheet.merged_cells.ranges])
+        self.assertEqual(sheet.row_dimensions[7].height, 30)
+
+    def test_cells_outside_used_range(self):
+        self.assert_round_trip({(25, 8): "ниже и правее", (1, 6): "правее заголовка"})
+        dimension = re.search(r'<dimension ref="([^"]+)"', sheet_xml(self.output_path, 0)).group(1)
+        self.assertEqual(dimension, "A1:H25")
+
+    def test_illegal_xml_characters_are_dropped(self):
+        XlsxCellPatcher(self.source_path).write(self.output_path, {(3, 2): "строка\x01с\x0bсимволами"})
+        self.assertEqual(load_workbook(self.output_path).active["B3"].value, "строкассимволами")
+
+    def test_second_sheet(self):
+        self.assert_round_trip({(1, 2): "новое", (2, 1): "Адрес"}, sheet_index=1)
+
+    @unittest.skipUnless(os.path.exists(SAMPLE_REPORT), "нет файла Отчет.xlsx")
+    def test_excel_saved_report(self):
+        shutil.copy(SAMPLE_REPORT, self.source_path)
+        workbook = load_workbook(self.source_path)
+        sheet = workbook.active
+        filled = sorted(sheet_values(sheet))
+        last_row, last_col = filled[-1]
+        self.assert_round_trip({
+            filled[0]: "заменено",
+            (last_row, sheet.max_column + 1): "справа от последней ячейки",
+            (sheet.max_row + 2, 1): "после последней строки",
+        }, sheet_index=workbook.index(sheet))
+        # Excel пишет spans="1:N" у строк - для строки с новой ячейкой правее он расширен
+        row_tag = re.search(rf'<row r="{last_row}"[^>]*>', sheet_xml(self.output_path, workbook.index(sheet))).group(0)
+        self.assertIn(f'spans="1:{sheet.max_column + 1}"', row_tag)
+
+
+if __name__ == "__main__":
+    unittest.main()
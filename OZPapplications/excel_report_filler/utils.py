@@ -1,13 +1,168 @@
 import re
+import weakref
+import numpy as np
 from fuzzywuzzy import fuzz
-from openpyxl.utils import get_column_letter
+
+try:
+    # rapidfuzz необязателен: если установлен, матрица оценок считается в C одним вызовом
+    from rapidfuzz import process as rapidfuzz_process, fuzz as rapidfuzz_fuzz
+except ImportError:
+    rapidfuzz_process = None
+    rapidfuzz_fuzz = None
+
+from stage_timer import StageTimer
+
+class SheetLabelIndex:
+    """
+    Индекс текстовых меток листа: нормализованный текст каждой непустой ячейки
+    с координатами всех ячеек, где он встречается.
+    Строится один раз для открытого листа и заменяет полный перебор
+    ячеек листа для каждого поля данных.
+    """
+    def __init__(self, worksheet=None):
+        # labels: {нормализованный текст: [(row, col), ...]}
+        self.labels = {}
+        # cells: {(row, col): нормализованный текст}
+        self.cells = {}
+        # Уникальные тексты в порядке добавления (столбцы матрицы оценок)
+        self._texts = []
+        # Заранее посчитанные строки матрицы оценок: {поле: np.array}
+        self._field_scores = {}
+        # merged_anchors: {(row, col): (row, col) верхней левой ячейки} для ячеек внутри объединений
+        self.merged_anchors = {}
+        self.cell_count = 0
+        if worksheet is not None:
+            # Обходим только реально существующие ячейки, не создавая пустые
+            # (worksheet.cell()/iter_rows() создают ячейки на каждой позиции)
+            for (row, col) in sorted(worksheet._cells):
+                self.add_cell(row, col, worksheet._cells[(row, col)].value)
+            for merged_range in worksheet.merged_cells.ranges:
+                self.add_merged_range(merged_range.min_row, merged_range.min_col, merged_range.max_row, merged_range.max_col)
+
+    @staticmethod
+    def normalize(value):
+        """Приводит значение ячейки к виду, в котором оно сравнивается с полями."""
+        return str(value).strip().lower()
+
+    def add_cell(self, row, col, value):
+        """Добавляет ячейку в индекс (пустые значения пропускаются)."""
+        if value is None:
+            return
+        text = self.normalize(value)
+        if not text:
+            return
+        self.cells[(row, col)] = text
+        if text not in self.labels:
+            self.labels[text] = []
+            self._texts.append(text)
+        self.labels[text].append((row, col))
+        self.cell_count += 1
+
+    def add_merged_range(self, min_row, min_col, max_row, max_col):
+        """Добавляет объединённый диапазон (для value_at)."""
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                if (row, col) != (min_row, min_col):
+                    self.merged_anchors[(row, col)] = (min_row, min_col)
+
+    def text_at(self, row, col):
+        """Возвращает нормализованный текст ячейки или None, если ячейка пуста."""
+        return self.cells.get((row, col))
+
+    def value_at(self, row, col):
+        """Как text_at, но для ячейки внутри объединения возвращает текст его верхней левой ячейки (как Utils.get_cell_value)."""
+        return self.cells.get(self.merged_anchors.get((row, col), (row, col)))
+
+    def score_fields(self, fields, threshold=85):
+        """
+        Считает оценки всех полей против всех меток листа одним вызовом
+        Utils.fuzzy_score_matrix; последующие find() берут строки из матрицы.
+        """
+        fields = list(fields)
+        matrix = Utils.fuzzy_score_matrix(fields, self._texts, score_cutoff=threshold)
+        self._field_scores = dict(zip(fields, matrix))
+
+    def has_candidates(self, threshold=85):
+        """Есть ли среди полей, посчитанных в score_fields, хотя бы одно совпадение с меткой."""
+        return any((scores >= threshold).any() for scores in self._field_scores.values())
+
+    def find(self, search_text, threshold=85):
+        """
+        Возвращает координаты ячеек, текст которых нечётко совпадает с `search_text`
+        (fuzz.ratio >= threshold), в порядке обхода листа (по строкам, затем по столбцам).
+        Каждый уникальный текст сравнивается один раз.
+        """
+        scores = self._field_scores.get(search_text)
+        if scores is None:
+            scores = Utils.fuzzy_score_matrix([search_text], self._texts)[0]
+        elif len(scores) < len(self._texts):
+            # Метки, добавленные после расчёта матрицы (например, записанные значения)
+            extra = Utils.fuzzy_score_matrix([search_text], self._texts[len(scores):])[0]
+            scores = np.concatenate((scores, extra))
+
+        found = []
+        for text_idx in np.flatnonzero(scores >= threshold):
+            found.extend(self.labels[self._texts[text_idx]])
+        found.sort()
+        return found
+
+
+class MergedCellIndex:
+    """
+    Индекс объединённых ячеек листа: для каждой ячейки, покрытой объединением,
+    хранит её диапазон. Отвечает за O(1), в какой диапазон входит ячейка,
+    вместо перебора worksheet.merged_cells.ranges при каждом вызове.
+    """
+    def __init__(self, worksheet=None):
+        # ranges: {(row, col): MergedCellRange}
+        self.ranges = {}
+        if worksheet is not None:
+            for merged_range in worksheet.merged_cells.ranges:
+                self.add_range(merged_range)
+
+    def add_range(self, merged_range):
+        """Добавляет диапазон в индекс."""
+        for row in range(merged_range.min_row, merged_range.max_row + 1):
+            for col in range(merged_range.min_col, merged_range.max_col + 1):
+                self.ranges[(row, col)] = merged_range
+
+    def get_range(self, row, col):
+        """Возвращает объединённый диапазон, содержащий ячейку, или None."""
+        return self.ranges.get((row, col))
+
 
 class Utils:
     """
     Содержит вспомогательные функции для различных операций в приложении.
     """
+    # Счётчики работы поиска для замеров: попадают в таймер обрабатываемого отчёта (StageTimer.count_active)
+    COUNTERS = ("fuzzy_calls", "fuzzy_comparisons", "cells_scanned")
+
     def __init__(self, config_manager=None):
         self.config_manager = config_manager
+        # Индексы объединённых ячеек по листам; сбрасываются через invalidate_sheet_cache
+        self._merged_indexes = weakref.WeakKeyDictionary()
+        # Версии листов: растут при каждом изменении листа (mark_sheet_modified, invalidate_sheet_cache)
+        self._sheet_versions = weakref.WeakKeyDictionary()
+        # Результаты поиска ключевых слов по листам: {лист: (версия листа, число ячеек, {запрос: попадания})}
+        self._keyword_hits = weakref.WeakKeyDictionary()
+
+    def get_merged_index(self, worksheet):
+        """Возвращает индекс объединённых ячеек листа, строя его при первом обращении."""
+        merged_index = self._merged_indexes.get(worksheet)
+        if merged_index is None:
+            merged_index = MergedCellIndex(worksheet)
+            self._merged_indexes[worksheet] = merged_index
+        return merged_index
+
+    def invalidate_sheet_cache(self, worksheet):
+        """Сбрасывает кэшированные индексы листа после изменения его структуры (вставка строк и т.п.)."""
+        self._merged_indexes.pop(worksheet, None)
+        self.mark_sheet_modified(worksheet)
+
+    def mark_sheet_modified(self, worksheet):
+        """Отмечает запись в ячейки листа: результаты поиска ключевых слов по нему больше не действительны."""
+        self._sheet_versions[worksheet] = self._sheet_versions.get(worksheet, 0) + 1
 
     def extract_address_from_filename(self, filename):
         """
@@ -33,42 +188,106 @@ class Utils:
         if not candidates_list:
             return None, 0
 
-        best_match = None
-        highest_score = 0
-
-        for candidate in candidates_list:
-            score = fuzz.ratio(search_text.lower(), candidate.lower())
-            if score > highest_score:
-                highest_score = score
-                best_match = candidate
+        scores = self.fuzzy_score_matrix([search_text], candidates_list)[0]
+        best_idx = int(np.argmax(scores)) # Первый из лучших, как и при последовательном переборе
+        highest_score = int(scores[best_idx])
 
         if highest_score >= threshold:
-            return best_match, highest_score
+            return candidates_list[best_idx], highest_score
         return None, 0
 
+    @staticmethod
+    def fuzzy_score_matrix(queries, choices, score_cutoff=0):
+        """
+        Считает оценки fuzz.ratio всех строк `queries` против всех строк `choices`
+        (регистронезависимо) одним вызовом.
+        Возвращает np.array формы (len(queries), len(choices)) с целыми оценками 0..100;
+        оценки ниже `score_cutoff` обнуляются.
+        Если установлен rapidfuzz, используется его process.cdist, иначе - цикл по fuzzywuzzy.
+        Оценки совпадают с fuzzywuzzy + python-Levenshtein (см. requirements.txt): та же метрика,
+        округление до целого через round() (np.rint - тоже к чётному).
+        """
+        queries = [str(q).lower() for q in queries]
+        choices = [str(c).lower() for c in choices]
+        StageTimer.count_active("fuzzy_calls")
+        StageTimer.count_active("fuzzy_comparisons", len(queries) * len(choices))
+        if not queries or not choices:
+            return np.zeros((len(queries), len(choices)), dtype=np.uint8)
+
+        if rapidfuzz_process is not None:
+            # Дробные оценки округляем сами: dtype=np.uint8 в cdist округляет .5 иначе, чем round()
+            matrix = rapidfuzz_process.cdist(queries, choices, scorer=rapidfuzz_fuzz.ratio, dtype=np.float64)
+            matrix = np.rint(matrix).astype(np.uint8)
+        else:
+            matrix = np.empty((len(queries), len(choices)), dtype=np.uint8)
+            for i, query in enumerate(queries):
+                matrix[i] = [fuzz.ratio(query, choice) for choice in choices]
+
+        if score_cutoff:
+            matrix[matrix < score_cutoff] = 0
+        return matrix
+
     def find_cell_by_keywords(self, worksheet, keywords, search_range=None):
         """
         Находит ячейку, содержащую одно из ключевых слов (регистронезависимо).
         `keywords` - список строк.
         `search_range` - кортеж (min_row, min_col, max_row, max_col) для ограничения поиска.
-        Возвращает (row, col) найденной ячейки или None.
+        Возвращает (row, col) первой найденной ячейки (по строкам, затем по столбцам) или None.
         """
-        # Преобразуем ключевые слова в нижний регистр для регистронезависимого поиска
-        lower_keywords = [k.lower() for k in keywords]
+        hits = self.find_cells_by_keywords(worksheet, keywords, search_range)
+        first_hits = [coords[0] for coords in hits.values() if coords]
+        return min(first_hits) if first_hits else None
 
+    def find_cells_by_keywords(self, worksheet, keywords, search_range=None):
+        """
+        Находит все ячейки с ключевыми словами за один обход листа (регистронезависимо).
+        Ключевые слова собираются в одно регулярное выражение, которое отбирает ячейки;
+        для отобранных ячеек определяется, какие именно слова в них встречаются.
+        Возвращает {ключевое слово (как передано): [(row, col), ...]} в порядке обхода листа.
+        Результат кэшируется для листа до следующей записи в него: после изменения ячеек
+        нужно вызвать mark_sheet_modified (или invalidate_sheet_cache при изменении структуры).
+        """
+        original_keywords = {}
+        for keyword in keywords:
+            if keyword:
+                original_keywords.setdefault(keyword.lower(), keyword)
+        lower_keywords = tuple(original_keywords)
+        cache_key = (lower_keywords, tuple(search_range) if search_range else None)
+        sheet_state = (self._sheet_versions.get(worksheet, 0), len(worksheet._cells))
+        sheet_cache = self._keyword_hits.get(worksheet)
+        if sheet_cache is None or sheet_cache[:2] != sheet_state:
+            sheet_cache = sheet_state + ({},)
+            self._keyword_hits[worksheet] = sheet_cache
+        hits = sheet_cache[2].get(cache_key)
+        if hits is None:
+            hits = self._scan_keywords(worksheet, lower_keywords, search_range)
+            sheet_cache[2][cache_key] = hits
+        return {original_keywords[k]: list(v) for k, v in hits.items()}
+
+    def _scan_keywords(self, worksheet, lower_keywords, search_range):
+        hits = {k: [] for k in lower_keywords}
+        if not lower_keywords:
+            return hits
         if search_range:
             min_row, min_col, max_row, max_col = search_range
         else:
-            min_row, min_col, max_row, max_col = 1, 1, worksheet.max_row, worksheet.max_column
-
-        for row in range(min_row, max_row + 1):
-            for col in range(min_col, max_col + 1):
-                cell_value = worksheet.cell(row=row, column=col).value
-                if cell_value is not None and isinstance(cell_value, str):
-                    for keyword in lower_keywords:
-                        if keyword in cell_value.lower():
-                            return row, col # Возвращаем 1-based индексы
-        return None
+            min_row, min_col, max_row, max_col = 1, 1, float('inf'), float('inf')
+        # Длинные слова раньше коротких, чтобы совпадение не обрывалось на префиксе
+        matcher = re.compile('|'.join(re.escape(k) for k in sorted(lower_keywords, key=len, reverse=True)))
+        StageTimer.count_active("cells_scanned", len(worksheet._cells))
+        # Обходим только реально существующие ячейки, не создавая пустые
+        for (row, col) in sorted(worksheet._cells):
+            if not (min_row <= row <= max_row and min_col <= col <= max_col):
+                continue
+            cell_value = worksheet._cells[(row, col)].value
+            if cell_value is None or not isinstance(cell_value, str):
+                continue
+            lower_value = cell_value.lower()
+            if matcher.search(lower_value):
+                for keyword in lower_keywords:
+                    if keyword in lower_value:
+                        hits[keyword].append((row, col)) # 1-based индексы
+        return hits
 
     def find_value_cell(self, worksheet, start_row, start_col, max_search_distance=5):
         """
@@ -105,26 +324,23 @@ class Utils:
         и эта объединенная ячейка пуста или содержит только пробелы.
         """
         # Проверяем, является ли ячейка частью объединенной области
-        for merged_cell_range in worksheet.merged_cells.ranges:
-            if cell.coordinate in merged_cell_range:
-                # Если это объединенная ячейка, проверяем ее верхнюю левую ячейку
-                # т.к. только она хранит значение для объединенной области
-                min_col_letter = get_column_letter(merged_cell_range.min_col)
-                top_left_cell_coord = f"{min_col_letter}{merged_cell_range.min_row}"
-                top_left_cell = worksheet[top_left_cell_coord]
-                return top_left_cell.value is None or str(top_left_cell.value).strip() == ''
+        merged_cell_range = self.get_merged_index(worksheet).get_range(cell.row, cell.column)
+        if merged_cell_range is not None:
+            # Если это объединенная ячейка, проверяем ее верхнюю левую ячейку
+            # т.к. только она хранит значение для объединенной области
+            top_left_cell = worksheet.cell(row=merged_cell_range.min_row, column=merged_cell_range.min_col)
+            return top_left_cell.value is None or str(top_left_cell.value).strip() == ''
 
         # Если ячейка не объединена, проверяем ее значение
         return cell.value is None or str(cell.value).strip() == ''
 
     def get_cell_value(self, worksheet, row, col):
         """Безопасно получает значение ячейки, учитывая объединенные ячейки."""
-        cell = worksheet.cell(row=row, column=col)
-        for merged_range in worksheet.merged_cells.ranges:
-            if cell.coordinate in merged_range:
-                # Если ячейка находится в объединенном диапазоне, возвращаем значение из верхней левой ячейки
-                return worksheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
-        return cell.value
+        merged_range = self.get_merged_index(worksheet).get_range(row, col)
+        if merged_range is not None:
+            # Если ячейка находится в объединенном диапазоне, возвращаем значение из верхней левой ячейки
+            return worksheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
+        return worksheet.cell(row=row, column=col).value
 
     def get_boolean_from_text(self, text):
         """Преобразует текстовое значение в булево (для наличия газа)."""
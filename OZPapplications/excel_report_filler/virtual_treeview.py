@@ -0,0 +1,270 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class SubstringIndex:
+    """
+    Индекс для поиска строк таблицы по подстроке (без учёта регистра).
+    Для запросов от 3 символов кандидаты берутся из пересечения списков триграмм,
+    затем проверяются точным вхождением. Если новый запрос продолжает предыдущий
+    (ввод по одной букве), поиск идёт только среди прошлого результата.
+    """
+    GRAM = 3
+
+    def __init__(self):
+        self._texts = {} # {ключ строки: текст для поиска в нижнем регистре}
+        self._grams = {} # {триграмма: множество ключей}
+        self._last_query = None
+        self._last_result = None
+
+    def add(self, key, *fields):
+        self.remove(key)
+        text = "\t".join(str(field) for field in fields).lower()
+        self._texts[key] = text
+        for gram in self._text_grams(text):
+            self._grams.setdefault(gram, set()).add(key)
+        self._last_query = None
+
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in self._text_grams(text):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+        self._last_query = None
+
+    def clear(self):
+        self._texts.clear()
+        self._grams.clear()
+        self._last_query = None
+
+    def matches(self, key, query):
+        return query.lower() in self._texts.get(key, "")
+
+    def search(self, query):
+        """Возвращает множество ключей строк, содержащих `query`."""
+        query = query.lower()
+        if self._last_query is not None and query.startswith(self._last_query):
+            candidates = self._last_result
+        elif len(query) >= self.GRAM:
+            posting_lists = sorted((self._grams.get(gram, set()) for gram in self._text_grams(query)), key=len)
+            candidates = set.intersection(*posting_lists) if posting_lists else set()
+        else:
+            candidates = self._texts.keys()
+        result = {key for key in candidates if query in self._texts[key]}
+        self._last_query, self._last_result = query, result
+        return result
+
+    @classmethod
+    def _text_grams(cls, text):
+        return {text[i:i + cls.GRAM] for i in range(len(text) - cls.GRAM + 1)}
+
+
+class VirtualTreeview:
+    """
+    Таблица на основе ttk.Treeview, которая создаёт элементы только для видимых строк.
+    Все строки хранятся в модели ({ключ: значения колонок}); при прокрутке одни и те же
+    элементы Treeview получают значения других строк. Поддерживает фильтр по подстроке
+    (SubstringIndex) и точечное обновление строк (upsert/remove) без перезаполнения.
+    Выделение хранится по ключам строк, поэтому сохраняется при прокрутке и фильтрации.
+    """
+    def __init__(self, master, columns, **tree_options):
+        self.frame = ttk.Frame(master)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", **tree_options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self._rows = {} # {ключ: значения колонок} в порядке добавления
+        self._index = SubstringIndex()
+        self._query = ""
+        self._visible_keys = [] # Ключи строк, прошедших фильтр
+        self._visible_set = set() # Те же ключи - для проверки принадлежности за O(1)
+        self._offset = 0 # Первая показанная строка в _visible_keys
+        self._slot_keys = {} # {элемент Treeview: ключ показанной в нём строки}
+        self._selected = set() # Ключи выделенных строк
+        self._rendering = False
+        self._rendering_reset = None # Отложенный сброс _rendering (after_idle)
+
+        self.tree.bind("<Configure>", lambda event: self._render())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        self.tree.bind("<Up>", lambda event: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda event: self._on_arrow(1))
+
+    # --- Данные ---
+    def set_rows(self, rows):
+        """Заменяет все строки. rows: список (ключ, значения колонок)."""
+        self._rows = {}
+        self._index.clear()
+        for key, values in rows:
+            self._rows[key] = tuple(values)
+            self._index.add(key, *values)
+        self._selected &= self._rows.keys()
+        self._apply_filter()
+
+    def extend_rows(self, rows):
+        """
+        Добавляет (или обновляет) порцию строк, например при заполнении таблицы частями.
+        Новые строки, подходящие под фильтр, дописываются в конец видимых - без пересчёта всего фильтра.
+        """
+        refilter = False
+        for key, values in rows:
+            is_new = key not in self._rows
+            self._rows[key] = tuple(values)
+            self._index.add(key, *values)
+            matches = not self._query or self._index.matches(key, self._query)
+            if is_new:
+                if matches:
+                    self._visible_keys.append(key)
+                    self._visible_set.add(key)
+            elif matches != (key in self._visible_set):
+                refilter = True # Обновлённая строка перестала или начала подходить под фильтр
+        if refilter:
+            self._apply_filter()
+        else:
+            self._render()
+
+    def upsert(self, key, values):
+        """Добавляет строку или обновляет существующую на месте."""
+        is_new = key not in self._rows
+        self._rows[key] = tuple(values)
+        self._index.add(key, *values)
+        matches = not self._query or self._index.matches(key, self._query)
+        if is_new and matches:
+            self._visible_keys.append(key)
+            self._visible_set.add(key)
+        elif not is_new and not matches and key in self._visible_set:
+            self._visible_keys.remove(key)
+            self._visible_set.discard(key)
+        elif not is_new and matches and key not in self._visible_set:
+            self._apply_filter()
+            return
+        self._render()
+
+    def remove(self, keys):
+        """Удаляет строки по ключам."""
+        keys = set(keys)
+        for key in keys:
+            self._rows.pop(key, None)
+            self._index.remove(key)
+        self._selected -= keys
+        self._visible_keys = [key for key in self._visible_keys if key not in keys]
+        self._visible_set -= keys
+        self._render()
+
+    def filter(self, query):
+        """Показывает только строки, содержащие `query` в любой колонке."""
+        self._query = query.strip()
+        self._offset = 0
+        self._apply_filter()
+
+    def selected_keys(self):
+        return [key for key in self._rows if key in self._selected]
+
+    def focused_values(self):
+        """Значения строки под фокусом клавиатуры (или None)."""
+        key = self._slot_keys.get(self.tree.focus())
+        return self._rows.get(key) if key is not None else None
+
+    def visible_count(self):
+        return len(self._visible_keys)
+
+    def _apply_filter(self):
+        if self._query:
+            found = self._index.search(self._query)
+            self._visible_keys = [key for key in self._rows if key in found]
+        else:
+            self._visible_keys = list(self._rows)
+        self._visible_set = set(self._visible_keys)
+        self._render()
+
+    # --- Прокрутка и отрисовка ---
+    def _page_size(self):
+        style = ttk.Style(self.tree)
+        try:
+            row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        except (TypeError, ValueError):
+            row_height = 20
+        height = self.tree.winfo_height()
+        if height <= 1: # Виджет ещё не размещён
+            return int(self.tree.cget("height"))
+        return max(1, (height - row_height - 4) // row_height) # Минус строка заголовков
+
+    def scroll(self, amount, what="units"):
+        step = self._page_size() if what == "pages" else 1
+        self._offset += int(amount) * step
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._offset = int(float(args[0]) * len(self._visible_keys))
+            self._render()
+        elif action == "scroll":
+            self.scroll(args[0], args[1])
+
+    def _on_arrow(self, direction):
+        """Стрелки на краю видимой области прокручивают список."""
+        slots = self.tree.get_children()
+        focus = self.tree.focus()
+        if not slots or focus not in slots:
+            return None
+        position = slots.index(focus) + direction
+        if 0 <= position < len(slots):
+            return None # Обычное перемещение внутри видимых строк
+        self.scroll(direction, "units")
+        slots = self.tree.get_children()
+        target = slots[0] if direction < 0 else slots[-1]
+        self.tree.focus(target)
+        self.tree.selection_set(target)
+        return "break"
+
+    def _render(self):
+        page_size = self._page_size()
+        total = len(self._visible_keys)
+        self._offset = max(0, min(self._offset, total - page_size))
+        window = self._visible_keys[self._offset:self._offset + page_size]
+
+        slots = list(self.tree.get_children())
+        if len(slots) > len(window):
+            self.tree.delete(*slots[len(window):])
+            slots = slots[:len(window)]
+        while len(slots) < len(window):
+            slots.append(self.tree.insert("", tk.END))
+
+        # <<TreeviewSelect>> от selection_set приходит через очередь событий, уже после возврата из
+        # _render, поэтому флаг сбрасывается только когда очередь обработана (after_idle)
+        self._rendering = True
+        if self._rendering_reset is None:
+            self._rendering_reset = self.tree.after_idle(self._end_rendering)
+        self._slot_keys = {}
+        selected_slots = []
+        for slot, key in zip(slots, window):
+            self.tree.item(slot, values=self._rows[key])
+            self._slot_keys[slot] = key
+            if key in self._selected:
+                selected_slots.append(slot)
+        self.tree.selection_set(selected_slots)
+
+        if total:
+            self.scrollbar.set(self._offset / total, (self._offset + len(window)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _end_rendering(self):
+        self._rendering = False
+        self._rendering_reset = None
+
+    def _on_select(self, event=None):
+        if self._rendering:
+            return
+        shown = set(self._slot_keys.values())
+        selected_now = {self._slot_keys[slot] for slot in self.tree.selection() if slot in self._slot_keys}
+        self._selected = (self._selected - shown) | selected_now
@@ -0,0 +1,201 @@
+import posixpath
+import re
+import shutil
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter, column_index_from_string, range_boundaries
+
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Символы, недопустимые в XML 1.0 (кроме табуляции и переводов строк)
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def find_sheet_part(source_zip, sheet_index):
+    """
+    Находит путь XML-части листа с номером `sheet_index` (как workbook.index(sheet) в openpyxl)
+    в открытом архиве .xlsx по workbook.xml и его связям.
+    """
+    workbook = ET.fromstring(source_zip.read('xl/workbook.xml'))
+    sheets = workbook.findall(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')
+    rel_id = sheets[sheet_index].get(f'{{{NS_REL}}}id')
+
+    rels = ET.fromstring(source_zip.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', target))
+    raise KeyError(f"Не найдена связь {rel_id} для листа {sheet_index}")
+
+
+class XlsxCellPatcher:
+    """
+    Быстрая запись значений в ячейки готового .xlsx ("быстрое заполнение").
+    Вместо полной пересборки книги (workbook.save) записи архива копируются потоком
+    как есть, а в XML листа заменяются только целевые ячейки (и при необходимости
+    расширяются <dimension> листа и spans строк).
+    Строки записываются как inline-строки (t="inlineStr"), поэтому sharedStrings.xml
+    не меняется. Содержимое остальных записей архива совпадает с исходным байт в байт.
+    """
+    def __init__(self, source_path):
+        self.source_path = source_path
+
+    def write(self, output_path, cell_values, sheet_index=0):
+        """
+        Сохраняет копию исходного файла в `output_path`, записав значения в ячейки листа.
+        `cell_values` - {(row, col): значение}; `sheet_index` - номер листа в книге
+        (как workbook.index(sheet) в openpyxl).
+        """
+        with zipfile.ZipFile(self.source_path) as source_zip:
+            sheet_part = find_sheet_part(source_zip, sheet_index)
+            sheet_xml = source_zip.read(sheet_part).decode('utf-8')
+            patched_xml = self.patch_sheet_xml(sheet_xml, cell_values).encode('utf-8')
+
+            with zipfile.ZipFile(output_path, 'w') as output_zip:
+                for info in source_zip.infolist():
+                    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                    new_info.external_attr = info.external_attr
+                    if info.filename == sheet_part:
+                        new_info.compress_type = zipfile.ZIP_DEFLATED
+                        output_zip.writestr(new_info, patched_xml)
+                    else:
+                        new_info.compress_type = info.compress_type
+                        # Запись распаковывается и сжимается заново потоком, без чтения целиком в память
+                        with source_zip.open(info) as source_entry, output_zip.open(new_info, 'w') as output_entry:
+                            shutil.copyfileobj(source_entry, output_entry)
+
+    # --- Правка XML листа ---
+    @classmethod
+    def patch_sheet_xml(cls, sheet_xml, cell_values):
+        """Возвращает XML листа, в котором ячейки `cell_values` {(row, col): значение} заменены."""
+        if not cell_values:
+            return sheet_xml
+
+        prefix_match = re.search(r'<(\w+:)?sheetData\b', sheet_xml)
+        if not prefix_match:
+            raise ValueError("В XML листа не найден элемент sheetData")
+        prefix = prefix_match.group(1) or ''
+
+        # Пустой лист: <sheetData/> заменяем на открытый элемент
+        empty_sheet_data = re.compile(rf'<{prefix}sheetData\s*/>')
+        if empty_sheet_data.search(sheet_xml):
+            sheet_xml = empty_sheet_data.sub(f'<{prefix}sheetData></{prefix}sheetData>', sheet_xml, count=1)
+
+        cells_by_row = {}
+        for (row, col), value in cell_values.items():
+            cells_by_row.setdefault(row, {})[col] = value
+
+        for row, row_cells in sorted(cells_by_row.items()):
+            sheet_xml = cls._patch_row(sheet_xml, prefix, row, row_cells)
+        return cls._extend_dimension(sheet_xml, prefix, cell_values)
+
+    @staticmethod
+    def _extend_dimension(sheet_xml, prefix, cell_values):
+        """
+        Расширяет <dimension ref> листа на записанные ячейки, если они вышли за его границы
+        (по нему openpyxl в режиме read_only определяет размеры листа).
+        """
+        dimension_match = re.search(rf'<{prefix}dimension\b[^>]*?\sref="([^"]+)"', sheet_xml)
+        if dimension_match is None:
+            return sheet_xml
+        min_col, min_row, max_col, max_row = range_boundaries(dimension_match.group(1))
+        rows = [row for row, _ in cell_values]
+        cols = [col for _, col in cell_values]
+        bounds = (min(min_col, *cols), min(min_row, *rows), max(max_col, *cols), max(max_row, *rows))
+        if bounds == (min_col, min_row, max_col, max_row):
+            return sheet_xml
+        ref = f'{get_column_letter(bounds[0])}{bounds[1]}:{get_column_letter(bounds[2])}{bounds[3]}'
+        return sheet_xml[:dimension_match.start(1)] + ref + sheet_xml[dimension_match.end(1):]
+
+    @classmethod
+    def _patch_row(cls, sheet_xml, prefix, row, row_cells):
+        row_pattern = re.compile(
+            rf'<{prefix}row\b(?=[^>]*\sr="{row}")[^>]*?(/>|>(.*?)</{prefix}row>)', re.DOTALL
+        )
+        row_match = row_pattern.search(sheet_xml)
+        if row_match is None:
+            return cls._insert_row(sheet_xml, prefix, row, row_cells)
+
+        if row_match.group(1) == '/>':
+            # Пустая строка без ячеек: <row r="5" .../> -> <row r="5" ...>ячейки</row>
+            open_tag = row_match.group(0)[:-2].rstrip() + '>'
+            row_content = ''
+        else:
+            open_tag = row_match.group(0)[:row_match.start(2) - row_match.start(0)]
+            row_content = row_match.group(2)
+
+        open_tag = cls._extend_spans(open_tag, row_cells)
+        for col, value in sorted(row_cells.items()):
+            row_content = cls._patch_cell(row_content, prefix, row, col, value)
+
+        new_row = f'{open_tag}{row_content}</{prefix}row>'
+        return sheet_xml[:row_match.start()] + new_row + sheet_xml[row_match.end():]
+
+    @staticmethod
+    def _extend_spans(open_tag, row_cells):
+        """Расширяет spans="min:max" строки, если записанные столбцы не входят ни в один из её диапазонов."""
+        spans_match = re.search(r'\sspans="([^"]*)"', open_tag)
+        if spans_match is None:
+            return open_tag
+        spans = [tuple(int(bound) for bound in span.split(':')) for span in spans_match.group(1).split()]
+        if not spans or all(any(span[0] <= col <= span[-1] for span in spans) for col in row_cells):
+            return open_tag
+        first = min(min(span[0] for span in spans), *row_cells)
+        last = max(max(span[-1] for span in spans), *row_cells)
+        return open_tag[:spans_match.start(1)] + f'{first}:{last}' + open_tag[spans_match.end(1):]
+
+    @classmethod
+    def _insert_row(cls, sheet_xml, prefix, row, row_cells):
+        """Вставляет новую строку в sheetData с сохранением порядка строк."""
+        cells_xml = ''.join(
+            cls._cell_xml(prefix, f'{get_column_letter(col)}{row}', value, '')
+            for col, value in sorted(row_cells.items())
+        )
+        new_row = f'<{prefix}row r="{row}">{cells_xml}</{prefix}row>'
+
+        insert_at = sheet_xml.index(f'</{prefix}sheetData>')
+        for existing in re.finditer(rf'<{prefix}row\b[^>]*?\sr="(\d+)"', sheet_xml):
+            if int(existing.group(1)) > row:
+                insert_at = existing.start()
+                break
+        return sheet_xml[:insert_at] + new_row + sheet_xml[insert_at:]
+
+    @classmethod
+    def _patch_cell(cls, row_content, prefix, row, col, value):
+        coordinate = f'{get_column_letter(col)}{row}'
+        cell_pattern = re.compile(
+            rf'<{prefix}c\b(?=[^>]*\sr="{coordinate}")([^>]*?)(/>|>.*?</{prefix}c>)', re.DOTALL
+        )
+        cell_match = cell_pattern.search(row_content)
+        if cell_match is not None:
+            # Сохраняем атрибуты ячейки (стиль и т.п.), кроме типа значения и координаты
+            attributes = re.sub(r'\s(t|r)="[^"]*"', '', cell_match.group(1))
+            new_cell = cls._cell_xml(prefix, coordinate, value, attributes)
+            return row_content[:cell_match.start()] + new_cell + row_content[cell_match.end():]
+
+        # Ячейки нет - вставляем её перед первой ячейкой правее
+        new_cell = cls._cell_xml(prefix, coordinate, value, '')
+        for existing in re.finditer(rf'<{prefix}c\b[^>]*?\sr="([A-Z]+)\d+"', row_content):
+            if column_index_from_string(existing.group(1)) > col:
+                return row_content[:existing.start()] + new_cell + row_content[existing.start():]
+        return row_content + new_cell
+
+    @staticmethod
+    def _cell_xml(prefix, coordinate, value, attributes):
+        if isinstance(value, bool):
+            return f'<{prefix}c r="{coordinate}"{attributes} t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+        if isinstance(value, (int, float)):
+            return f'<{prefix}c r="{coordinate}"{attributes}><{prefix}v>{value!r}</{prefix}v></{prefix}c>'
+        text = _ILLEGAL_XML_CHARS.sub('', str(value))
+        if text.startswith('=') and len(text) > 1:
+            # Как и openpyxl, строку со знаком "=" в начале записываем формулой
+            return f'<{prefix}c r="{coordinate}"{attributes}><{prefix}f>{escape(text[1:])}</{prefix}f><{prefix}v></{prefix}v></{prefix}c>'
+        return (f'<{prefix}c r="{coordinate}"{attributes} t="inlineStr"><{prefix}is>'
+                f'<{prefix}t xml:space="preserve">{escape(text)}</{prefix}t></{prefix}is></{prefix}c>')